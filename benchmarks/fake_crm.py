@@ -0,0 +1,43 @@
+# File: benchmarks/fake_crm.py
+"""
+CRM de prueba en SQLite con la vista vtigercrm_2022.calendar_2025_materialized. Las
+columnas que CalendarQueries resuelve por posición (1, 10, 12, 13 y 25) están en el
+mismo lugar que en MySQL.
+"""
+import sqlite3
+from sqlalchemy import event
+
+# Columnas en el orden de la vista; las cNN solo ocupan posiciones
+COLUMNS = [
+    'member_id', 'so_no', 'Compañía', 'Broker', 'Month', 'rn', 'OV_Count', 'c07', 'c08', 'c09',
+    'Problema', 'c11', 'Pagado_Hasta', 'Terminación', 'c14', 'c15', 'c16', 'c17', 'c18', 'c19',
+    'c20', 'c21', 'c22', 'c23', 'c24', 'Efectividad',
+]
+
+def create_crm(path: str, df_rows):
+    """Crea la base SQLite del CRM con las filas de generate_crm_rows."""
+    connection = sqlite3.connect(path)
+    column_sql = ", ".join(f'"{column}"' for column in COLUMNS)
+    connection.execute("DROP TABLE IF EXISTS calendar_2025_materialized")
+    connection.execute(f"CREATE TABLE calendar_2025_materialized ({column_sql})")
+    connection.execute("CREATE INDEX idx_member ON calendar_2025_materialized (member_id)")
+    rows = (
+        (member_id, so_no, company, broker, month, 1, 1, None, None, None, problem, None,
+         paid_through, term, *([None] * 11), effective)
+        for member_id, so_no, company, broker, month, problem, paid_through, term, effective in df_rows[[
+            'member_id', 'so_no', 'company', 'broker', 'month', 'problem', 'paid_through', 'term', 'effective'
+        ]].itertuples(index=False)
+    )
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    connection.executemany(f"INSERT INTO calendar_2025_materialized VALUES ({placeholders})", rows)
+    connection.commit()
+    connection.close()
+
+def install(engine, path: str):
+    """
+    Conecta el engine de SQLAlchemy al CRM de prueba, adjuntando la base como el
+    esquema vtigercrm_2022.
+    """
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS vtigercrm_2022")
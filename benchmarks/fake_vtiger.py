@@ -0,0 +1,115 @@
+# File: benchmarks/fake_vtiger.py
+"""
+Servidor HTTP local que implementa las operaciones de webservice.php que usa
+VTigerWSClient (getchallenge, login, query, retrieve, update, describe, listtypes),
+con latencia configurable y contadores de llamadas por operación.
+"""
+import collections
+import json
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+IN_QUERY = re.compile(r"salesorder_no\s+IN\s*\((?P<values>[^)]*)\)(?:\s+LIMIT\s+(?P<offset>\d+)\s*,\s*(?P<limit>\d+))?", re.I)
+EQ_QUERY = re.compile(r"salesorder_no\s*=\s*'(?P<value>[^']*)'", re.I)
+
+class FakeVTiger:
+    def __init__(self, salesorder_nos=(), latency: float = 0.0):
+        self.latency = latency
+        self.session = 'bench-session'
+        self.records = {
+            so_no: {'id': f'6x{i}', 'salesorder_no': so_no, 'cf_2261': ''}
+            for i, so_no in enumerate(salesorder_nos, start=1)
+        }
+        self.calls = collections.Counter()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}/'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, parameters: dict) -> dict:
+        operation = parameters.get('operation')
+        with self.lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if operation == 'getchallenge':
+            return {'success': True, 'result': {'token': 'token', 'expireTime': 0, 'serverTime': 0}}
+        if operation == 'login':
+            return {'success': True, 'result': {'sessionName': self.session, 'userId': '19x1'}}
+        if parameters.get('sessionName') != self.session:
+            return {'success': False, 'error': {'code': 'INVALID_SESSIONID', 'message': 'Session expired'}}
+        if operation == 'query':
+            return {'success': True, 'result': self._query(parameters['query'])}
+        if operation == 'retrieve':
+            record = next((r for r in self.records.values() if r['id'] == parameters.get('id')), None)
+            if record is None:
+                return {'success': False, 'error': {'code': 'RECORD_NOT_FOUND', 'message': 'Not found'}}
+            return {'success': True, 'result': record}
+        if operation == 'update':
+            element = json.loads(parameters['element'])
+            with self.lock:
+                self.records[element.get('salesorder_no', element.get('id'))] = element
+            return {'success': True, 'result': element}
+        if operation == 'describe':
+            return {'success': True, 'result': {'name': parameters.get('elementType'), 'fields': []}}
+        if operation == 'listtypes':
+            return {'success': True, 'result': {'types': ['SalesOrder']}}
+        return {'success': False, 'error': {'code': 'UNKNOWN_OPERATION', 'message': operation}}
+
+    def _query(self, query: str) -> list:
+        match = IN_QUERY.search(query)
+        if match:
+            values = re.findall(r"'([^']*)'", match.group('values'))
+            found = [self.records[value] for value in values if value in self.records]
+            offset = int(match.group('offset') or 0)
+            limit = int(match.group('limit') or 100)
+            return found[offset:offset + limit]
+        match = EQ_QUERY.search(query)
+        if match and match.group('value') in self.records:
+            return [self.records[match.group('value')]]
+        return []
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Sin esto, encabezados y cuerpo en envíos separados chocan con el ACK retardado
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, parameters):
+                body = json.dumps(fake.handle(parameters)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = urllib.parse.urlsplit(self.path).query
+                self._reply(dict(urllib.parse.parse_qsl(query)))
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self._reply(dict(urllib.parse.parse_qsl(self.rfile.read(length).decode())))
+
+        return Handler
@@ -0,0 +1,75 @@
+# File: benchmarks/generate_data.py
+"""
+Genera datos sintéticos para los benchmarks: un CSV de carrier con el esquema de
+get_fields/estrategia (Aetna, Oscar o default) y las filas correspondientes de
+calendar_2025_materialized para el CRM de prueba.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+
+BROKER_NAMES = {'BS': 'BEATRIZ SIERRA', 'AD': 'ANA DANIELLA CORRALES'}
+OSCAR_STATUSES = np.array(['Active', 'Active', 'Active', 'Grace period', 'Delinquent', 'Inactive'])
+
+def _random_dates(rng, size, start, days):
+    offsets = rng.integers(0, days, size=size)
+    return pd.to_datetime(start) + pd.to_timedelta(offsets, unit='D')
+
+def generate_carrier_csv(company: str, rows: int, path: str, seed: int = 0) -> pd.Series:
+    """
+    Escribe el CSV del carrier y retorna los memberIDs generados.
+    """
+    rng = np.random.default_rng(seed)
+    member_ids = pd.Series(np.arange(rows)).map('M{:09d}'.format)
+    today = pd.Timestamp(datetime.date.today())
+    company = company.lower()
+
+    if company == 'aetna':
+        fmt = '%B %d, %Y'
+        df = pd.DataFrame({
+            'Member ID': member_ids,
+            'Issuer Assigned ID': member_ids,
+            'Effective Date': _random_dates(rng, rows, '2024-01-01', 700).strftime(fmt),
+            'Paid Through Date': _random_dates(rng, rows, today - pd.Timedelta(days=90), 150).strftime(fmt),
+            'Broker Term Date': '',
+        })
+    elif company == 'oscar':
+        df = pd.DataFrame({
+            'Member ID': member_ids,
+            'Policy status': rng.choice(OSCAR_STATUSES, size=rows),
+            'Coverage start date': _random_dates(rng, rows, '2024-01-01', 700).strftime('%m/%d/%Y'),
+            'Coverage end date': _random_dates(rng, rows, today, 500).strftime('%m/%d/%Y'),
+        })
+    else:
+        # DefaultStrategy no renombra columnas, por lo que se generan ya normalizadas
+        df = pd.DataFrame({
+            'memberID': member_ids,
+            'paidThroughDate': _random_dates(rng, rows, today - pd.Timedelta(days=90), 150).strftime('%m/%d/%Y'),
+            'policyTermDate': _random_dates(rng, rows, today, 500).strftime('%m/%d/%Y'),
+        })
+    df.to_csv(path, index=False)
+    return member_ids
+
+def generate_crm_rows(member_ids: pd.Series, company: str, broker: str, seed: int = 0,
+                      coverage: float = 0.9, orphans: float = 0.02) -> pd.DataFrame:
+    """
+    Genera filas del calendario para una fracción de los miembros, más órdenes huérfanas
+    que no están en el CSV.
+    """
+    rng = np.random.default_rng(seed + 1)
+    today = pd.Timestamp(datetime.date.today())
+    in_crm = member_ids[rng.random(len(member_ids)) < coverage]
+    orphan_ids = pd.Series(np.arange(int(len(member_ids) * orphans))).map('X{:09d}'.format)
+    ids = pd.concat([in_crm, orphan_ids], ignore_index=True)
+    size = len(ids)
+    return pd.DataFrame({
+        'member_id': ids,
+        'so_no': 'SO' + ids,
+        'company': company,
+        'broker': BROKER_NAMES.get(broker, broker),
+        'month': today.replace(day=1).strftime('%Y-%m-%d'),
+        'problem': np.where(rng.random(size) < 0.03, 'Problema Pago', ''),
+        'paid_through': _random_dates(rng, size, today - pd.Timedelta(days=120), 150).strftime('%Y-%m-%d'),
+        'term': _random_dates(rng, size, today, 500).strftime('%Y-%m-%d'),
+        'effective': _random_dates(rng, size, '2024-01-01', 700).strftime('%Y-%m-%d'),
+    })
@@ -0,0 +1,167 @@
+# File: benchmarks/run.py
+"""
+Benchmark de extremo a extremo de SOService.process contra un CRM SQLite y un
+webservice.php local, sin tocar producción.
+
+    python -m benchmarks.run --company oscar --rows 1000 100000 --latency-ms 20 --workers 16
+
+Reporta filas/s, consultas SQL, llamadas HTTP, memoria pico y el tiempo de cada etapa,
+además de las consultas SQL y llamadas HTTP de cada etapa. Cada tamaño corre en su propio
+proceso, así la memoria pico (ru_maxrss) es la de ese tamaño y no la de uno anterior.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Mismo layout de imports que usa el paquete instalado (config, WSClient y handlers como módulos de primer nivel)
+for path in (ROOT, os.path.join(ROOT, 'company_sync')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+os.environ.setdefault('TQDM_DISABLE', '1')
+
+import argparse
+import collections
+import json
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+
+def run_once(args, rows: int, workdir: str, engine, logger, query_counter) -> dict:
+    from benchmarks.fake_crm import create_crm
+    from benchmarks.fake_vtiger import FakeVTiger
+    from benchmarks.generate_data import generate_carrier_csv, generate_crm_rows
+    from company_sync.strategies.registry import build_strategy
+    from company_sync.metrics import record_vtiger_call, reset_metrics
+    from company_sync.services.so_service import SOService
+    from WSClient import VTigerWSClient
+
+    csv_path = os.path.join(workdir, f'{args.company}_{rows}.csv')
+    member_ids = generate_carrier_csv(args.company, rows, csv_path, seed=args.seed)
+    crm_rows = generate_crm_rows(member_ids, args.company.capitalize(), args.broker, seed=args.seed)
+    create_crm(os.path.join(workdir, 'crm.sqlite'), crm_rows)
+    engine.dispose()
+
+    with FakeVTiger(crm_rows['so_no'], latency=args.latency_ms / 1000) as fake:
+        client = VTigerWSClient(fake.url, on_request=record_vtiger_call)
+        client.doLogin('bench', 'key')
+        service = SOService(csv_path, args.company.capitalize(), args.broker, build_strategy(args.company),
+                            client, logger, workers=args.workers, max_rps=args.max_rps,
+                            chunksize=args.chunksize)
+        metrics = reset_metrics(company=args.company, broker=args.broker)
+
+        query_counter.clear()
+        if args.tracemalloc:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        service.process()
+        elapsed = time.perf_counter() - started
+        client.close()
+        http_calls = dict(fake.calls)
+
+    http_calls.pop('getchallenge', None)
+    http_calls.pop('login', None)
+    result = {
+        'company': args.company,
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed) if elapsed else None,
+        'db_queries': query_counter['queries'],
+        'http_calls': sum(http_calls.values()),
+        'http_calls_by_operation': http_calls,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'stages': {stage: round(seconds, 3) for stage, seconds in metrics.stages.items()},
+        'stage_db_queries': {stage: counters.get('sql_queries', 0) for stage, counters in metrics.stage_counters.items()},
+        'stage_http_calls': {
+            stage: sum(value for counter, value in counters.items() if counter.startswith('vtiger_') and counter.endswith('_calls'))
+            for stage, counters in metrics.stage_counters.items()
+        },
+    }
+    if args.tracemalloc:
+        result['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    return result
+
+def print_results(results: list):
+    stages = sorted({stage for result in results for stage in result['stages']})
+    columns = ['rows', 'seconds', 'rows_per_second', 'db_queries', 'http_calls', 'max_rss_mb'] + stages
+    if any('traced_peak_mb' in result for result in results):
+        columns.insert(6, 'traced_peak_mb')
+    table = [[str(result.get(column, result['stages'].get(column, ''))) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in table)) for i, column in enumerate(columns)]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in table:
+        print('  '.join(value.rjust(width) for value, width in zip(row, widths)))
+
+def print_stage_counters(results: list):
+    """Consultas SQL y llamadas HTTP de cada etapa (las etapas anidadas cuentan en ambas)."""
+    columns = ['rows', 'stage', 'seconds', 'db_queries', 'http_calls']
+    table = [
+        [str(result['rows']), stage, str(seconds),
+         str(result['stage_db_queries'].get(stage, 0)), str(result['stage_http_calls'].get(stage, 0))]
+        for result in results for stage, seconds in sorted(result['stages'].items())
+    ]
+    widths = [max(len(column), *(len(row[i]) for row in table)) for i, column in enumerate(columns)]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in table:
+        print('  '.join(value.rjust(width) for value, width in zip(row, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SOService against a local fake CRM and VTiger')
+    parser.add_argument('--company', default='oscar', choices=['aetna', 'oscar', 'default'], help='Carrier CSV schema')
+    parser.add_argument('--broker', default='BS', help='Broker code')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help='CSV sizes to benchmark')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated latency of each VTiger call')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent VTiger update workers')
+    parser.add_argument('--max-rps', type=float, default=None, help='Maximum VTiger requests per second')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream the CSV in chunks of this many rows')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+    parser.add_argument('--tracemalloc', action='store_true', help='Also report the traced Python allocation peak (slower)')
+    parser.add_argument('--json', type=str, default=None, help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    # Un proceso nuevo por tamaño: ru_maxrss y tracemalloc miden solo ese tamaño
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for rows in args.rows:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(run_size, args, rows).result())
+    print_results(results)
+    print()
+    print_stage_counters(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+def run_size(args, rows: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix='company_sync_bench_')
+    try:
+        # El engine de company_sync.database se crea en el primer uso con esta URI
+        config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'main.sqlite')}"
+        from sqlalchemy import event
+        from benchmarks.fake_crm import install
+        from company_sync.database import get_reporting_engine
+
+        engine = get_reporting_engine()
+        from company_sync.logging_config import setup_logging
+
+        install(engine, os.path.join(workdir, 'crm.sqlite'))
+        query_counter = collections.Counter()
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count_query(*_):
+            query_counter['queries'] += 1
+
+        logger = setup_logging(os.path.join(workdir, 'problems.csv'))
+        if args.tracemalloc:
+            tracemalloc.start()
+        return run_once(args, rows, workdir, engine, logger, query_counter)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
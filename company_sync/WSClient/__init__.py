@@ -20,10 +20,13 @@ import json, urllib
 import urllib.parse
 import urllib.request
 import hashlib
+import time
+from .connection_pool import HTTPConnectionPool
+from company_sync.metrics import timed
 
 # Vtiger Webservice Client
 class VTigerWSClient:
-    def __init__(self, url):
+    def __init__(self, url, pool_size=10, connect_timeout=10, read_timeout=60, compress=True, on_request=None):
         # Webservice file
         self._servicebase = 'webservice.php'
 
@@ -50,6 +53,12 @@ class VTigerWSClient:
         if url.endswith(self._servicebase) == False: url += self._servicebase
         self._serviceurl  = url
 
+        # Persistent keep-alive connections, shared by every thread using this client
+        self._pool = HTTPConnectionPool(url, pool_size, connect_timeout, read_timeout, compress)
+
+        # Optional callback(operation, seconds, error) invoked after every request
+        self._onrequest = on_request
+
     '''
     Perform GET request and return response
     @url URL to connect
@@ -59,8 +68,7 @@ class VTigerWSClient:
     def __doGet(self, url, parameters=False, tojson=True):
         if not parameters: parameters = {}
         useurl = (url + '?' + urllib.parse.urlencode(parameters))
-        connection = urllib.request.urlopen(useurl)
-        response = connection.read()
+        response = self.__request(parameters, 'GET', useurl)
         if tojson == True: response = json.loads(response)
         return response
 
@@ -73,12 +81,33 @@ class VTigerWSClient:
     def __doPost(self, url, parameters=False, tojson=True):
         if not parameters: parameters = {}
         data = urllib.parse.urlencode(parameters).encode()
-        req =  urllib.request.Request(url, data=data)
-        connection = urllib.request.urlopen(req)
-        response = connection.read()
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        response = self.__request(parameters, 'POST', url, body=data, headers=headers)
         if tojson == True: response = self.toJSON(response)
         return response
 
+    '''
+    Send a request through the connection pool, reporting it to the on_request callback
+    '''
+    def __request(self, parameters, method, url, body=None, headers=None):
+        if self._onrequest is None:
+            return self._pool.request(method, url, body=body, headers=headers)
+        started = time.perf_counter()
+        error = None
+        try:
+            return self._pool.request(method, url, body=body, headers=headers)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._onrequest(parameters.get('operation', ''), time.perf_counter() - started, error)
+
+    '''
+    Close pooled connections
+    '''
+    def close(self):
+        self._pool.close()
+
     '''
     Convert input data to JSON
     '''
@@ -194,6 +223,7 @@ class VTigerWSClient:
     '''
     Perform Query operation
     '''
+    @timed('VTigerWSClient.doQuery')
     def doQuery(self, query):
         if not self.__checkLogin(): return False
 
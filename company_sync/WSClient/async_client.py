@@ -0,0 +1,279 @@
+# Asyncio Vtiger Webservice Client
+# Requires the optional aiohttp dependency (poetry install -E async)
+import asyncio
+import hashlib
+import json
+
+import aiohttp
+
+# Error codes returned by webservice.php when the session is no longer valid
+SESSION_ERRORS = ('INVALID_SESSIONID', 'AUTHENTICATION_REQUIRED')
+
+class AsyncVTigerWSClient:
+    def __init__(self, url, concurrency=50, timeout=60):
+        # Webservice file
+        self._servicebase = 'webservice.php'
+
+        if url.endswith('/') == False: url += '/'
+        if url.endswith(self._servicebase) == False: url += self._servicebase
+        self._serviceurl = url
+
+        # Webservice login validity
+        self._servicetoken = False
+        self._expiretime   = False
+        self._servertime   = False
+
+        # Webservice user credentials
+        self._serviceuser  = False
+        self._servicekey   = False
+
+        # Webservice login credentials
+        self._userid       = False
+        self._sessionid    = False
+
+        # Last operation error information
+        self._lasterror    = False
+
+        # Connection reuse and in-flight request limit
+        self._concurrency = concurrency
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session = None
+        self._loginlock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    '''
+    Lazily create the shared HTTP session (keep-alive connection pool)
+    '''
+    def __getSession(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    '''
+    Close pooled connections
+    '''
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    '''
+    Perform GET request and return decoded JSON response
+    '''
+    async def __doGet(self, parameters):
+        async with self._semaphore:
+            async with self.__getSession().get(self._serviceurl, params=parameters) as response:
+                response.raise_for_status()
+                return json.loads(await response.read())
+
+    '''
+    Perform POST request and return decoded JSON response
+    '''
+    async def __doPost(self, parameters):
+        async with self._semaphore:
+            async with self.__getSession().post(self._serviceurl, data=parameters) as response:
+                response.raise_for_status()
+                return json.loads(await response.read())
+
+    '''
+    Perform an authenticated operation, logging in again once if the session expired
+    '''
+    async def __doOperation(self, parameters, type='GET'):
+        if not self.__checkLogin(): return False
+        response = await self.__send(parameters, type)
+        if self.__isSessionError(response):
+            await self.__relogin(parameters['sessionName'])
+            response = await self.__send(parameters, type)
+        return response
+
+    async def __send(self, parameters, type):
+        parameters['sessionName'] = self._sessionid
+        if type.upper() == 'POST':
+            return await self.__doPost(parameters)
+        return await self.__doGet(parameters)
+
+    '''
+    Check if the response failed because of an invalid session
+    '''
+    def __isSessionError(self, response):
+        if not response or response.get('success') != False: return False
+        error = response.get('error') or {}
+        return error.get('code') in SESSION_ERRORS
+
+    '''
+    Login again with the stored credentials, once for all concurrent callers
+    '''
+    async def __relogin(self, expiredsession):
+        async with self._loginlock:
+            if self._sessionid != expiredsession: return
+            await self.doLogin(self._serviceuser, self._servicekey)
+
+    '''
+    Convert input object to JSON String
+    '''
+    def toJSONString(self, indata):
+        for key, value in indata.items():
+            if isinstance(value, int):
+                indata[key] = str(value)
+
+        return json.dumps(indata)
+
+    '''
+    Check if webservice response was not successful
+    '''
+    def hasError(self, response):
+        if not response or (response['success'] == False):
+            self._lasterror = response['error'] if response else False
+            return True
+        self._lasterror = False
+        return False
+
+    '''
+    Get last operation error
+    '''
+    def lastError(self):
+        return self._lasterror
+
+    '''
+    Check webservice login.
+    '''
+    def __checkLogin(self):
+        return (self._userid != False)
+
+    '''
+    Create MD5 value (hexdigest)
+    '''
+    def __md5(self, indata):
+        m = hashlib.md5(indata.encode())
+        return m.hexdigest()
+
+    '''
+    Get record id sent from the server
+    '''
+    def getRecordId(self, record):
+        ids = record.split('x')
+        return ids[1]
+
+    '''
+    Perform Challenge operation
+    '''
+    async def __doChallenge(self, username):
+        parameters = {
+            'operation' : 'getchallenge',
+            'username' : username
+        }
+        response = await self.__doGet(parameters)
+        if not self.hasError(response):
+            result = response['result']
+            self._servicetoken = result['token']
+            self._expiretime = result['expireTime']
+            self._servertime = result['serverTime']
+            return True
+        return False
+
+    '''
+    Perform Login operation
+    '''
+    async def doLogin(self, username, accesskey):
+        if await self.__doChallenge(username) == False: return False
+        parameters = {
+            'operation' : 'login',
+            'username'  : username,
+            'accessKey' : self.__md5(self._servicetoken + accesskey)
+        }
+        response = await self.__doPost(parameters)
+        if not self.hasError(response):
+            result = response['result']
+            self._serviceuser = username
+            self._servicekey  = accesskey
+            self._sessionid   = result['sessionName']
+            self._userid      = result['userId']
+            return True
+        return False
+
+    '''
+    Perform ListTypes operation
+    @return modules names list
+    '''
+    async def doListTypes(self):
+        response = await self.__doOperation({'operation': 'listtypes'})
+        if self.hasError(response): return False
+        return {modulename: {'name': modulename} for modulename in response['result']['types']}
+
+    '''
+    Perform Query operation
+    '''
+    async def doQuery(self, query):
+        sanitized_query = " ".join(query.split())
+        # Make the query end with ;
+        if not sanitized_query.endswith(';'): sanitized_query += ';'
+
+        response = await self.__doOperation({'operation': 'query', 'query': sanitized_query})
+        if self.hasError(response): return False
+        return response['result']
+
+    '''
+    Perform Describe operation on the module
+    '''
+    async def doDescribe(self, module):
+        response = await self.__doOperation({'operation': 'describe', 'elementType': module})
+        if self.hasError(response): return False
+        return response['result']
+
+    '''
+    Perform Retrieve operation on the module record.
+    '''
+    async def doRetrieve(self, record):
+        response = await self.__doOperation({'operation': 'retrieve', 'id': record})
+        if self.hasError(response): return False
+        return response['result']
+
+    '''
+    Perform create operation on the module.
+    '''
+    async def doCreate(self, module, valuemap):
+        if 'assigned_user_id' not in valuemap:
+            valuemap['assigned_user_id'] = self._userid
+
+        parameters = {
+            'operation'   : 'create',
+            'elementType' : module,
+            'element'     : self.toJSONString({key: value for key, value in valuemap.items() if str(value) != 'nan'})
+        }
+        response = await self.__doOperation(parameters, 'POST')
+        if self.hasError(response): return False
+        return response['result']
+
+    '''
+    Perform update operation on the module record, returning the raw response.
+    '''
+    async def doUpdate(self, valuemap):
+        if 'assigned_user_id' not in valuemap:
+            valuemap['assigned_user_id'] = self._userid
+
+        parameters = {
+            'operation'   : 'update',
+            'element'     : self.toJSONString({key: value for key, value in valuemap.items() if str(value) != 'nan'})
+        }
+        return await self.__doOperation(parameters, 'POST')
+
+    '''
+    Invoke webservice method
+    '''
+    async def doInvoke(self, method, params = False, type = 'POST'):
+        parameters = {'operation': method}
+        if params is not False:
+            for key in params:
+                if key not in parameters:
+                    parameters[key] = params[key]
+
+        response = await self.__doOperation(parameters, type)
+        if self.hasError(response): return False
+        return response['result']
@@ -0,0 +1,110 @@
+# Import required libraries
+import gzip
+import http.client
+import queue
+import urllib.error
+import urllib.parse
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+# Thread-safe pool of persistent HTTP(S) connections to a single host
+class HTTPConnectionPool:
+    def __init__(self, url, maxsize=10, connect_timeout=10, read_timeout=60, compress=True):
+        parts = urllib.parse.urlsplit(url)
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._maxsize = maxsize
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._compress = compress
+        # Idle connections ready to be reused
+        self._idle = queue.LifoQueue(maxsize)
+
+    '''
+    Open a new connection applying connect and read timeouts
+    '''
+    def __newConnection(self):
+        if self._scheme == 'https':
+            connection = http.client.HTTPSConnection(self._host, self._port, timeout=self._connect_timeout)
+        else:
+            connection = http.client.HTTPConnection(self._host, self._port, timeout=self._connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self._read_timeout)
+        return connection
+
+    '''
+    Take an idle connection from the pool or open a new one
+    @return (connection, reused)
+    '''
+    def __getConnection(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self.__newConnection(), False
+
+    '''
+    Return a connection to the pool, closing it if the pool is full
+    '''
+    def __putConnection(self, connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    '''
+    Perform a request reusing a pooled connection
+    @method HTTP method
+    @url Full URL (only path and query are used)
+    @body Encoded request body
+    @headers Extra request headers
+    @return Response body (decompressed when gzip encoded)
+    '''
+    def request(self, method, url, body=None, headers=None):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query: path += '?' + parts.query
+
+        headers = dict(headers or {})
+        if self._compress: headers.setdefault('Accept-Encoding', 'gzip')
+
+        connection, reused = self.__getConnection()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            # The server dropped an idle keep-alive connection, retry once on a fresh one
+            if not reused: raise
+            connection = self.__newConnection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close: connection.close()
+        else: self.__putConnection(connection)
+
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            data = gzip.decompress(data)
+        return data
+
+    '''
+    Close every idle connection
+    '''
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
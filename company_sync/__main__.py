@@ -1,42 +1,104 @@
 # File: company_sync/main.py
 import argparse
-import config
-from company_sync.logging_config import setup_logging
-from WSClient import VTigerWSClient
-from company_sync.services.so_service import SOService
-from company_sync.strategies.aetna_strategy import AetnaStrategy
-from company_sync.strategies.oscar_strategy import OscarStrategy
-from company_sync.strategies.base_strategy import BaseStrategy
+
+# pandas, SQLAlchemy y las estrategias se importan dentro de main, después de leer los
+# argumentos, para que --help y --validate respondan sin cargarlos
+
+def build_strategy(company: str):
+    from company_sync.strategies.registry import build_strategy
+    return build_strategy(company)
 
 def main():
     parser = argparse.ArgumentParser(description='CLI Tool for VTiger Sales Order Sync')
-    parser.add_argument('csv', type=str, help='Path to CSV file')
+    parser.add_argument('csv', type=str, nargs='?', help='Path to CSV file (not used with --apply or --resume)')
     parser.add_argument('company', type=str, help='Company name (e.g., Aetna, Oscar)')
     parser.add_argument('broker', type=str, help='Broker name')
+    parser.add_argument('--workers', type=int, default=1, help='Number of concurrent VTiger update workers')
+    parser.add_argument('--max-rps', type=float, default=None, help='Maximum VTiger requests per second (unlimited by default)')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per VTiger request on network errors')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream the CSV in chunks of this many rows')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the normalized CSV cache')
+    parser.add_argument('--full', action='store_true', help='Process every member, even if unchanged since the last run')
+    parser.add_argument('--buffered-log', action='store_true', help='Write problems.csv in batches from a background thread')
+    parser.add_argument('--log-sink', action='append', choices=['jsonl', 'parquet'], default=[],
+                        help='Also write problems as JSONL/Parquet (requires --buffered-log)')
+    parser.add_argument('--metrics-json', type=str, default=None, help='Write a JSON run report with per-stage timings and counters')
+    parser.add_argument('--metrics-prom', type=str, default=None, help='Write the run metrics as a Prometheus textfile')
+    parser.add_argument('--profile', type=str, default=None, metavar='FILE',
+                        help='Profile the run with cProfile and write the pstats to FILE (metadata in FILE.json)')
+    parser.add_argument('--live', action='store_true', help='Always query the live CRM view, ignoring the local snapshot')
+    parser.add_argument('--refresh-snapshot', action='store_true', help='Refresh the local CRM snapshot before the run')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--plan', type=str, default=None, metavar='FILE',
+                      help='Compute every update and diagnostic without writing to VTiger; save them to FILE (.jsonl or .parquet)')
+    mode.add_argument('--apply', type=str, default=None, metavar='FILE',
+                      help='Send the updates of a plan file written by --plan, without reading the CSV or CRM')
+    mode.add_argument('--resume', action='store_true',
+                      help='Only resend the updates an interrupted run left unfinished in the update journal')
+    mode.add_argument('--validate', action='store_true',
+                      help='Only check that the CSV has the columns the company strategy needs; no CRM or VTiger access')
     args = parser.parse_args()
-    
-    logger = setup_logging()
-    
-    # Selecciona la estrategia adecuada según la compañía
-    if args.company.lower() == 'aetna':
-        strategy = AetnaStrategy()
-    elif args.company.lower() == 'oscar':
-        strategy = OscarStrategy()
-    else:
-        # Estrategia por defecto (sin lógica especial)
-        class DefaultStrategy(BaseStrategy):
-            def apply_logic(self, df):
-                return df
-            def get_fields(self):
-                from company_sync.utils import get_fields
-                return get_fields(args.company)
-        strategy = DefaultStrategy()
-    
-    vtiger_client = VTigerWSClient(config.VTIGER_HOST)
+    if args.csv is None and not (args.apply or args.resume):
+        parser.error('the csv argument is required unless --apply or --resume is given')
+
+    strategy = build_strategy(args.company)
+
+    if args.validate:
+        from company_sync.processors.csv_validator import validate_csv
+        problems = validate_csv(args.csv, strategy)
+        for problem in problems:
+            print(problem)
+        print(f"{args.csv}: {'inválido' if problems else 'válido'} para {type(strategy).__name__}")
+        raise SystemExit(1 if problems else 0)
+
+    import config
+    from WSClient import VTigerWSClient
+    from company_sync.logging_config import setup_logging
+    from company_sync.metrics import enable_timing, record_vtiger_call, reset_metrics
+    from company_sync.processors.csv_cache import CSVCache
+    from company_sync.profiling import profile_run
+    from company_sync.repositories.crm_snapshot import CRMSnapshot
+    from company_sync.repositories.state_repository import StateRepository
+    from company_sync.repositories.update_journal import UpdateJournal
+    from company_sync.run_context import RunContext
+    from company_sync.services.so_service import SOService
+
+    logger = setup_logging(buffered=args.buffered_log or bool(args.log_sink), sinks=args.log_sink)
+
+    metrics = reset_metrics(company=args.company, broker=args.broker)
+    enable_timing(bool(args.profile or args.metrics_json or args.metrics_prom))
+    vtiger_client = VTigerWSClient(config.VTIGER_HOST, on_request=record_vtiger_call)
     vtiger_client.doLogin(config.VTIGER_USERNAME, config.VTIGER_TOKEN)
-    
-    service = SOService(args.csv, args.company, args.broker, strategy, vtiger_client, logger)
-    service.process()
+
+    # Las fechas de la ejecución se fijan antes de refrescar la copia local del CRM
+    context = RunContext.create()
+    snapshot = None if args.live else CRMSnapshot()
+    if snapshot is not None and args.refresh_snapshot:
+        snapshot.refresh(context.date_params()['month_start'])
+
+    service = SOService(args.csv, args.company, args.broker, strategy, vtiger_client, logger,
+                        workers=args.workers, max_rps=args.max_rps, retries=args.retries,
+                        chunksize=args.chunksize, cache=None if args.no_cache else CSVCache(),
+                        state=StateRepository(args.company, args.broker, full=args.full),
+                        plan=args.plan, journal=UpdateJournal(args.company, args.broker), snapshot=snapshot,
+                        context=context)
+    if args.apply:
+        run = lambda: service.apply(args.apply)
+    elif args.resume:
+        run = service.resume
+    else:
+        run = service.process
+    if args.profile:
+        with profile_run(args.profile, company=args.company, broker=args.broker,
+                         strategy=type(strategy).__name__, csv=args.csv or args.apply):
+            run()
+    else:
+        run()
+
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
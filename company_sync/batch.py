@@ -0,0 +1,139 @@
+# File: company_sync/batch.py
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import config
+from WSClient import VTigerWSClient
+
+# Estado de cada proceso del pool: logger y cliente VTiger autenticado, reutilizados entre trabajos
+_worker = {}
+
+def load_manifest(path: str) -> list:
+    """
+    Carga el manifiesto de trabajos (JSON, CSV o YAML). Cada trabajo define 'csv',
+    'company' y 'broker', y opcionalmente 'workers', 'max_rps' y 'chunksize'.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as f:
+        if extension == '.json':
+            jobs = json.load(f)
+        elif extension in ('.yaml', '.yml'):
+            import yaml  # Dependencia opcional, solo para manifiestos YAML
+            jobs = yaml.safe_load(f)
+        elif extension == '.csv':
+            jobs = list(csv.DictReader(f))
+        else:
+            raise ValueError(f"Formato de manifiesto no soportado: {path}")
+    if isinstance(jobs, dict):
+        jobs = jobs.get('jobs', [])
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        missing = {'csv', 'company', 'broker'} - set(job)
+        if missing:
+            raise ValueError(f"Trabajo sin {', '.join(sorted(missing))}: {job}")
+        job['csv'] = os.path.join(base_dir, job['csv'])
+    return jobs
+
+def _init_worker(timing: bool = False):
+    from company_sync import database
+    from company_sync.logging_config import setup_logging
+    # Los pools heredados del proceso padre no deben compartir conexiones con este proceso
+    database.dispose(close=False)
+    from company_sync.metrics import enable_timing, record_vtiger_call
+    enable_timing(timing)
+    client = VTigerWSClient(config.VTIGER_HOST, on_request=record_vtiger_call)
+    client.doLogin(config.VTIGER_USERNAME, config.VTIGER_TOKEN)
+    _worker['client'] = client
+    _worker['logger'] = setup_logging()
+
+def run_job(job: dict, options: dict) -> dict:
+    from company_sync.strategies.registry import build_strategy
+    from company_sync.metrics import reset_metrics
+    from company_sync.processors.csv_cache import CSVCache
+    from company_sync.repositories.crm_snapshot import CRMSnapshot
+    from company_sync.repositories.state_repository import StateRepository
+    from company_sync.repositories.update_journal import UpdateJournal
+    from company_sync.services.so_service import SOService
+
+    started = time.monotonic()
+    summary = {'csv': job['csv'], 'company': job['company'], 'broker': job['broker']}
+    metrics = reset_metrics(company=job['company'], broker=job['broker'])
+    try:
+        service = SOService(job['csv'], job['company'], job['broker'], build_strategy(job['company']),
+                            _worker['client'], _worker['logger'],
+                            workers=int(job.get('workers') or options['workers']),
+                            max_rps=float(job.get('max_rps') or options['max_rps'] or 0) or None,
+                            retries=options['retries'],
+                            chunksize=int(job.get('chunksize') or options['chunksize'] or 0) or None,
+                            cache=None if options['no_cache'] else CSVCache(),
+                            state=StateRepository(job['company'], job['broker'], full=options['full']),
+                            journal=UpdateJournal(job['company'], job['broker']),
+                            snapshot=None if options['live'] else CRMSnapshot(),
+                            context=options['context'])
+        summary.update(service.process() or {})
+        summary['status'] = 'ok'
+    except Exception as e:
+        summary['status'] = f"error: {e}"
+    summary['seconds'] = round(time.monotonic() - started, 1)
+    summary['metrics'] = metrics.to_dict()
+    return summary
+
+def print_summary(results: list):
+    columns = ['company', 'broker', 'status', 'seconds', 'sql_queries', 'vtiger_queries', 'retries', 'unchanged_rows', 'csv']
+    rows = [[str(result.get(column, '')) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Run several VTiger Sales Order syncs in parallel')
+    parser.add_argument('manifest', type=str, help='Path to a JSON, CSV or YAML manifest of csv/company/broker jobs')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Number of parallel sync processes')
+    parser.add_argument('--workers', type=int, default=1, help='Number of concurrent VTiger update workers per job')
+    parser.add_argument('--max-rps', type=float, default=None, help='Maximum VTiger requests per second per job')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per VTiger request on network errors')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream each CSV in chunks of this many rows')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the normalized CSV cache')
+    parser.add_argument('--metrics-json', type=str, default=None, help='Write the per-job run reports to this JSON file')
+    parser.add_argument('--full', action='store_true', help='Process every member, even if unchanged since the last run')
+    parser.add_argument('--live', action='store_true', help='Always query the live CRM view, ignoring the local snapshot')
+    args = parser.parse_args()
+
+    from company_sync.run_context import RunContext
+
+    jobs = load_manifest(args.manifest)
+    options = {'workers': args.workers, 'max_rps': args.max_rps, 'retries': args.retries,
+               'chunksize': args.chunksize, 'no_cache': args.no_cache, 'full': args.full, 'live': args.live,
+               # Todos los trabajos usan las mismas fechas que la carga de la copia local
+               'context': RunContext.create()}
+
+    if not args.live:
+        # Una sola carga de la vista para todos los trabajos; los procesos leen la copia local
+        from company_sync import database
+        from company_sync.repositories.crm_snapshot import CRMSnapshot
+        snapshot = CRMSnapshot()
+        month_start = options['context'].date_params()['month_start']
+        if not snapshot.is_fresh(month_start):
+            print(f"Copia local del CRM actualizada: {snapshot.refresh(month_start)} filas")
+        snapshot.close()
+        database.remove_session()
+
+    results = []
+    processes = max(1, min(args.processes or 1, len(jobs)))
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(bool(args.metrics_json),)) as pool:
+        futures = [pool.submit(run_job, job, options) for job in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+    print_summary(results)
+    if args.metrics_json:
+        with open(args.metrics_json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,38 @@ DB_PASSWORD = os.getenv('DB_PASSWORD')
 
 SQLALCHEMY_DATABASE_URI = f'{DB_TYPE}+{DB_CONNECTOR}://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DATABASE}'
 
+# Pool de conexiones del engine
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+# Filas por lote al leer con cursor de servidor (0 desactiva el streaming)
+DB_YIELD_PER = int(os.getenv('DB_YIELD_PER', '0'))
+
+# Año de las pólizas que se sincronizan y sus fechas de corte (YYYY-MM-DD)
+PLAN_YEAR = int(os.getenv('PLAN_YEAR', '2025'))
+CUTOFF_DATE = os.getenv('CUTOFF_DATE', f'{PLAN_YEAR}-01-01')
+MOLINA_TERM_DATE = os.getenv('MOLINA_TERM_DATE', f'{PLAN_YEAR}-12-31')
+
+# Columnas de la vista del calendario, p. ej. "problem=Problema,paidThroughDateCRM=Pagado_Hasta".
+# Las que no se indiquen se toman por su posición histórica en la vista
+CRM_CALENDAR_COLUMNS = os.getenv('CRM_CALENDAR_COLUMNS', '')
+
+# Caché columnar de CSVs normalizados
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'company_sync'))
+CACHE_MAX_MB = int(os.getenv('CACHE_MAX_MB', '2048'))
+
+# Estado local de la sincronización incremental
+STATE_DIR = os.getenv('STATE_DIR', os.path.join(os.path.expanduser('~'), '.local', 'state', 'company_sync'))
+
+# Las actualizaciones del diario que fallaron estas veces, o que llevan estas horas pendientes, ya no se reenvían
+JOURNAL_MAX_ATTEMPTS = int(os.getenv('JOURNAL_MAX_ATTEMPTS', '5'))
+JOURNAL_MAX_AGE_HOURS = float(os.getenv('JOURNAL_MAX_AGE_HOURS', '72'))
+
+# Copia local del calendario del CRM; pasadas estas horas sin refrescar se consulta la vista en vivo
+CRM_SNAPSHOT_PATH = os.getenv('CRM_SNAPSHOT_PATH', os.path.join(STATE_DIR, 'crm_snapshot.sqlite'))
+CRM_SNAPSHOT_MAX_AGE_HOURS = float(os.getenv('CRM_SNAPSHOT_MAX_AGE_HOURS', '6'))
+
 def setup_logging():
     """
     Configura el logger global con el nivel INFO.
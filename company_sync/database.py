@@ -1,13 +1,75 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session as OrmSession, scoped_session
 import config
 
-# Crear la conexión utilizando la URI definida en config
-engine = create_engine(config.SQLALCHEMY_DATABASE_URI, echo=False)
-Session = sessionmaker(bind=engine)
+_lock = threading.Lock()
+_engines = {}
+
+def _create_engine(read_only: bool):
+    url = make_url(config.SQLALCHEMY_DATABASE_URI)
+    options = {'echo': False, 'pool_pre_ping': True, 'pool_recycle': config.DB_POOL_RECYCLE}
+    # SQLite en memoria usa un pool de un hilo que no admite tamaño ni desborde
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options.update(pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW,
+                       pool_timeout=config.DB_POOL_TIMEOUT)
+    if read_only and url.get_backend_name() == 'mysql':
+        options['isolation_level'] = 'READ COMMITTED'
+    engine = create_engine(url, **options)
+
+    if read_only:
+        @event.listens_for(engine, 'connect')
+        def set_read_only(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if url.get_backend_name() == 'mysql':
+                cursor.execute('SET SESSION TRANSACTION READ ONLY')
+            elif url.get_backend_name() == 'sqlite':
+                cursor.execute('PRAGMA query_only = ON')
+            cursor.close()
+    return engine
+
+def get_engine(read_only: bool = False):
+    """
+    Retorna el engine de la base de datos, creándolo en el primer uso con la
+    configuración de pool definida en config. Con read_only=True retorna el engine
+    de las consultas de reporte, con su propio pool de conexiones de solo lectura.
+    """
+    engine = _engines.get(read_only)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(read_only)
+            if engine is None:
+                engine = _engines[read_only] = _create_engine(read_only)
+    return engine
+
+def get_reporting_engine():
+    """
+    Retorna el engine de solo lectura usado por las consultas al calendario del CRM.
+    """
+    return get_engine(read_only=True)
+
+# Una sesión por hilo (worker), reutilizada durante toda la ejecución
+Session = scoped_session(lambda: OrmSession(bind=get_reporting_engine()))
 
 def get_session():
     """
-    Retorna una nueva sesión de base de datos.
+    Retorna la sesión de solo lectura del hilo actual. La misma sesión se reutiliza
+    en todas las consultas del hilo hasta llamar a remove_session().
+    """
+    return Session()
+
+def remove_session():
+    """
+    Cierra la sesión del hilo actual y devuelve su conexión al pool.
+    """
+    Session.remove()
+
+def dispose(close: bool = True):
+    """
+    Descarta los pools de conexiones. Con close=False no cierra las conexiones
+    heredadas de un proceso padre, como se requiere tras un fork.
     """
-    return Session()
\ No newline at end of file
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose(close=close)
@@ -1,12 +1,26 @@
 # File: company_sync/handlers/crm_handler.py
 import pandas as pd
 import logging
-from tqdm import tqdm
+from dataclasses import dataclass
+from company_sync.logging_config import log_many
+from company_sync.metrics import get_metrics
 from company_sync.repositories.crm_repository import CRMRepository
 
+@dataclass
+class MergeResult:
+    # Filas del CSV con su orden de venta del CRM (vacía si no está en el CRM), en el orden
+    # del merge; salesOrder_no entra en la huella del estado incremental
+    csv_rows: pd.DataFrame
+    # Miembros que están en el CSV y en el CRM
+    matched: pd.DataFrame
+    # Miembros del portal que no tienen orden de venta en el CRM
+    portal_only: pd.DataFrame
+    # Órdenes de venta del CRM que no están en el portal
+    orphaned: pd.DataFrame
+
 class CRMHandler:
-    def __init__(self, company: str, broker: str):
-        self.repo = CRMRepository(company, broker)
+    def __init__(self, company: str, broker: str, snapshot=None, context=None):
+        self.repo = CRMRepository(company, broker, snapshot=snapshot, context=context)
         self.company = company
         self.broker = broker
         self.logger = logging.getLogger(__name__)
@@ -14,15 +28,38 @@ class CRMHandler:
     def fetch_data(self) -> pd.DataFrame:
         return self.repo.fetch_sales_orders()
     
-    def merge_data(self, df_crm: pd.DataFrame, df_csv: pd.DataFrame) -> pd.DataFrame:
+    def merge_data(self, df_crm: pd.DataFrame, df_csv: pd.DataFrame) -> MergeResult:
+        df_crm = df_crm.assign(memberID=df_crm['memberID'].astype(str))
+        df_csv = df_csv.assign(memberID=df_csv['memberID'].astype(str))
         df_merged = pd.merge(df_crm, df_csv, on="memberID", how="outer", indicator=True)
-        df_missing = df_merged[df_merged['_merge'] == 'left_only']
-        for _, row in tqdm(df_missing.iterrows(), total=len(df_missing), desc="Validando Órdenes de Venta..."):
-            memberID = str(row['memberID'])
-            if not memberID:
-                salesOrder_no = str(row['salesOrder_no'])
-                self.logger.info("Se encontró una orden de venta pero no está en el portal", extra={'memberid': salesOrder_no})
-            else:
-                self.logger.info("Se encontró una orden de venta pero no está en el portal", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-        return df_csv
-    
\ No newline at end of file
+        side = df_merged.pop('_merge')
+        result = MergeResult(
+            csv_rows=df_merged[side != 'left_only'].reset_index(drop=True),
+            matched=df_merged[side == 'both'].reset_index(drop=True),
+            portal_only=df_merged[side == 'right_only'].reset_index(drop=True),
+            orphaned=df_merged.loc[side == 'left_only', df_crm.columns].reset_index(drop=True),
+        )
+        self.log_orphaned(result.orphaned)
+        metrics = get_metrics()
+        metrics.incr('members_matched', result.matched['memberID'].nunique())
+        metrics.incr('members_portal_only', result.portal_only['memberID'].nunique())
+        metrics.incr('sales_orders_orphaned', len(result.orphaned))
+        return result
+
+    def join_sales_orders(self, df_crm: pd.DataFrame, df_csv: pd.DataFrame) -> pd.DataFrame:
+        """
+        Filas de un bloque del CSV con su orden de venta del CRM (vacía si no está en el
+        CRM), con las mismas columnas que MergeResult.csv_rows.
+        """
+        df_crm = df_crm.assign(memberID=df_crm['memberID'].astype(str))
+        df_csv = df_csv.assign(memberID=df_csv['memberID'].astype(str))
+        return pd.merge(df_crm, df_csv, on="memberID", how="right")
+
+    def log_orphaned(self, df_orphaned: pd.DataFrame):
+        # Las órdenes sin memberID se identifican por su número de orden de venta
+        has_member = df_orphaned['memberID'] != ''
+        extras = [
+            {'memberid': memberID, 'company': self.company, 'broker': self.broker} if member else {'memberid': str(salesOrder_no)}
+            for memberID, salesOrder_no, member in zip(df_orphaned['memberID'], df_orphaned['salesOrder_no'], has_member)
+        ]
+        log_many(self.logger, logging.INFO, "Se encontró una orden de venta pero no está en el portal", extras)
@@ -1,5 +1,6 @@
 import logging
 import csv
+import threading
 from datetime import datetime
 
 class CSVHandler(logging.Handler):
@@ -14,24 +15,98 @@ class CSVHandler(logging.Handler):
         # Escribir el encabezado si el archivo está vacío
         if self.file.tell() == 0:
             self.writer.writeheader()
+        # Fecha y hora formateadas del último segundo visto, para no repetir strftime
+        self._last_second = None
+        self._last_stamp = ('', '')
+
+    def format_entry(self, record):
+        # Convertir el timestamp del registro en datetime y formatear la fecha y hora
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_second = second
+            self._last_stamp = tuple(datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S').split(' '))
+        return {
+            'company': getattr(record, 'company', ''),
+            'broker': getattr(record, 'broker', ''),
+            'date': self._last_stamp[0],
+            'time': self._last_stamp[1],
+            'memberid': getattr(record, 'memberid', ''),
+            'description': record.getMessage()
+        }
 
     def emit(self, record):
         try:
-            # Convertir el timestamp del registro en datetime y formatear la fecha y hora
-            record_time = datetime.fromtimestamp(record.created)
-            log_entry = {
-                'company': getattr(record, 'company', ''),
-                'broker': getattr(record, 'broker', ''),
-                'date': record_time.strftime('%Y-%m-%d'),
-                'time': record_time.strftime('%H:%M:%S'),
-                'memberid': getattr(record, 'memberid', ''),
-                'description': record.getMessage()
-            }
-            self.writer.writerow(log_entry)
+            self.writer.writerow(self.format_entry(record))
             self.file.flush()
         except Exception:
             self.handleError(record)
 
+    def emit_many(self, records):
+        """Escribe varios registros con un solo flush."""
+        try:
+            self.writer.writerows(self.format_entry(record) for record in records)
+            self.file.flush()
+        except Exception:
+            if records:
+                self.handleError(records[0])
+
     def close(self):
         self.file.close()
-        super().close()
\ No newline at end of file
+        super().close()
+
+
+class BufferedCSVHandler(CSVHandler):
+    """
+    Variante de CSVHandler que acumula los registros y los escribe por lotes, al llegar
+    a batch_size registros o cada flush_interval segundos. Pensado para usarse detrás
+    de un QueueListener, de modo que la escritura ocurra en un hilo de fondo. Los
+    sinks adicionales (JSONLSink, ParquetSink) reciben los mismos lotes.
+    """
+    def __init__(self, filename, fieldnames, mode='a', encoding='utf-8', batch_size=500, flush_interval=1.0, sinks=()):
+        super().__init__(filename, fieldnames, mode=mode, encoding=encoding)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sinks = list(sinks)
+        self.buffer = []
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='csv-log-flusher', daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format_entry(record))
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def emit_many(self, records):
+        try:
+            self.buffer.extend(self.format_entry(record) for record in records)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+        except Exception:
+            if records:
+                self.handleError(records[0])
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer or self.file.closed:
+                return
+            entries, self.buffer = self.buffer, []
+            self.writer.writerows(entries)
+            self.file.flush()
+            for sink in self.sinks:
+                sink.write(entries)
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+        super().close()
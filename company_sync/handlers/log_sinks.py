@@ -0,0 +1,42 @@
+# File: company_sync/handlers/log_sinks.py
+import json
+
+class JSONLSink:
+    """Escribe los lotes de problemas como JSON Lines, una entrada por línea."""
+    def __init__(self, filename, mode='a', encoding='utf-8'):
+        self.file = open(filename, mode, encoding=encoding)
+
+    def write(self, entries):
+        self.file.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """
+    Escribe los lotes de problemas en un archivo Parquet, un row group por lote.
+    El archivo se reemplaza en cada ejecución. Requiere pyarrow (extra 'cache').
+    """
+    def __init__(self, filename, fieldnames):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.pq = pq
+        self.filename = filename
+        self.schema = pa.schema([(name, pa.string()) for name in fieldnames])
+        # Construir una tabla vacía carga ahora los módulos perezosos de pyarrow; el último
+        # lote puede escribirse durante el apagado del intérprete, cuando ya no se puede
+        self.pa.table({name: [] for name in self.schema.names}, schema=self.schema)
+        self.writer = None
+
+    def write(self, entries):
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.filename, self.schema)
+        columns = {name: [str(entry.get(name, '')) for entry in entries] for name in self.schema.names}
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
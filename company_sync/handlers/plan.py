@@ -0,0 +1,45 @@
+# File: company_sync/handlers/plan.py
+import json
+import os
+from company_sync.handlers.log_sinks import JSONLSink, ParquetSink
+
+# Columnas de cada entrada del plan; todas se guardan como texto
+PLAN_FIELDS = ['kind', 'memberID', 'action', 'salesorder_no', 'paidThroughDate', 'valuemap']
+PLAN_UPDATE = 'update'
+PLAN_DIAGNOSTIC = 'diagnostic'
+
+def _is_parquet(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+def open_plan(path: str):
+    """
+    Abre un archivo de plan para escritura, Parquet o JSON Lines según la extensión.
+    El archivo se reemplaza si ya existe.
+    """
+    if _is_parquet(path):
+        return ParquetSink(path, PLAN_FIELDS)
+    return JSONLSink(path, mode='w')
+
+def read_plan(path: str) -> list:
+    """Lee las entradas de un archivo de plan escrito con open_plan."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pylist()
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def update_entry(memberID: str, salesorder_no: str, paidThroughDate: str, valuemap: dict) -> dict:
+    return {
+        'kind': PLAN_UPDATE, 'memberID': memberID, 'action': PLAN_UPDATE, 'salesorder_no': salesorder_no,
+        'paidThroughDate': paidThroughDate, 'valuemap': json.dumps(valuemap, ensure_ascii=False),
+    }
+
+def diagnostic_entry(memberID: str, action: str, salesorder_no='') -> dict:
+    return {
+        'kind': PLAN_DIAGNOSTIC, 'memberID': memberID, 'action': action,
+        'salesorder_no': salesorder_no if isinstance(salesorder_no, str) else '', 'paidThroughDate': '', 'valuemap': '',
+    }
+
+def planned_updates(entries) -> list:
+    """Retorna los trabajos (memberID, valuemap) de las actualizaciones del plan."""
+    return [(entry['memberID'], json.loads(entry['valuemap'])) for entry in entries if entry['kind'] == PLAN_UPDATE]
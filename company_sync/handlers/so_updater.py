@@ -1,96 +1,299 @@
 # File: company_sync/handlers/so_updater.py
-import datetime
 import logging
-from sqlalchemy import text
 from tqdm import tqdm
-from company_sync.database import get_session
-from company_sync.utils import last_day_of_month
+from company_sync.handlers.plan import diagnostic_entry, planned_updates, update_entry
+from company_sync.handlers.update_executor import UpdateExecutor
+from company_sync.logging_config import log_many
+from company_sync.metrics import get_metrics, timed
+from company_sync.processors.decision_engine import (
+    ACTION_BOUNCED, ACTION_MISSING, ACTION_NO_SALES_ORDER, ACTION_SKIP,
+    ACTION_TERM_DATE_PROBLEM, ACTION_UNPAID, ACTION_UPDATE, DecisionEngine, iter_decision_rows,
+)
+from company_sync.repositories.crm_repository import CRMRepository
+from company_sync.repositories.update_journal import FAILED, SENT, SUCCEEDED
+from company_sync.repositories.vtiger_repository import SalesOrderRepository
+from company_sync.run_context import RunContext
 
 class SOUpdater:
-    def __init__(self, vtiger_client, company: str, data_config: dict, broker: str, logger=None):
+    def __init__(self, vtiger_client, company: str, data_config: dict, broker: str, logger=None, repo=None, executor=None, state=None, plan=None, journal=None, context=None):
         self.vtiger_client = vtiger_client
         self.company = company
         self.data_config = data_config
         self.broker = broker
         self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.repo = repo if repo is not None else CRMRepository(company, broker)
+        self.sales_order_repo = SalesOrderRepository(vtiger_client)
+        self.executor = executor if executor is not None else UpdateExecutor()
+        self.context = context or RunContext.create()
+        self.engine = DecisionEngine(company, data_config, self.context)
+        # Mensajes de diagnóstico por acción, con las fechas de la ejecución ya formateadas
+        self.messages = {
+            ACTION_TERM_DATE_PROBLEM: f"La póliza está en crm con una fecha inferior al {self.context.cutoff_date.strftime('%Y-%m-%d')} o tiene mal el policy status",
+            ACTION_BOUNCED: "A la póliza le rebotó la fecha de pago",
+            ACTION_UNPAID: f"Se encontró una orden de venta pero no está paga al {self.context.month_end.strftime('%Y-%m-%d')}",
+            ACTION_NO_SALES_ORDER: "No se encontró una orden de venta pero si está en el portal",
+            ACTION_MISSING: "La póliza no está en el crm",
+        }
+        # StateRepository opcional para la sincronización incremental
+        self.state = state
+        # Filas del calendario, cargadas en bloque por prefetch_crm_rows
+        self.df_crm = None
+        # Con un plan abierto (open_plan) las actualizaciones se escriben en él en vez de enviarse
+        self.plan = plan
+        # UpdateJournal opcional: las actualizaciones pendientes sobreviven a una interrupción
+        self.journal = journal
+        # Con el CSV por bloques (scan): fechas ganadoras y huellas de cada miembro en todo
+        # el CSV, y los miembros ya decididos en un bloque anterior
+        self.winners = None
+        self.fingerprints = None
+        self.decided = set()
     
-    def update_sales_order(self, memberID: str, paidThroughDate: str, salesOrderData: dict):
-        try:
-            if salesOrderData.get('cf_2261') != paidThroughDate:
-                salesOrderData['cf_2261'] = paidThroughDate
-                salesOrderData['productid'] = '14x29415'
-                salesOrderData['assigned_user_id'] = '19x113'
-                salesOrderData['LineItems'] = {
-                    'productid': '14x29415',
-                    'listprice': '0',
-                    'quantity': '1'
-                }
-                return self.vtiger_client.doUpdate(salesOrderData)
-        except Exception as e:
-            self.logger.error(f"Error updating memberID {memberID}: {e}")
+    def build_update(self, paidThroughDate: str, salesOrderData: dict):
+        """
+        Prepara el valuemap de doUpdate, o retorna None si la orden ya está al día.
+        """
+        if salesOrderData.get('cf_2261') == paidThroughDate:
             return None
+        salesOrderData['cf_2261'] = paidThroughDate
+        salesOrderData['productid'] = '14x29415'
+        salesOrderData['assigned_user_id'] = '19x113'
+        salesOrderData['LineItems'] = {
+            'productid': '14x29415',
+            'listprice': '0',
+            'quantity': '1'
+        }
+        return salesOrderData
 
-    def process_order(self, row):
-        memberID = str(row['memberID'])
-        paidThroughDateString = str(row.get('paidThroughDate', ''))
-        policyTermDateString = str(row.get('policyTermDate', ''))
-        paidThroughDate = None
-        policyTermDate = None
-
-        if paidThroughDateString not in ('None', '', 'nan'):
-            paidThroughDate = datetime.datetime.strptime(paidThroughDateString, self.data_config['format']).date()
-        if policyTermDateString not in ('None', '', 'nan'):
-            policyTermDate = datetime.datetime.strptime(policyTermDateString, '%m/%d/%Y').date()
-        if policyTermDate and self.company.lower() == 'molina':
-            policyTermDate = datetime.datetime.strptime('12/31/2025', '%m/%d/%Y').date()
-
-        if (policyTermDate and policyTermDate > datetime.date(2025, 1, 1)) or (paidThroughDate and paidThroughDate > datetime.date(2025, 1, 1)):
-            try:
-                with get_session() as session:
-                    query = f"""
-                        SELECT *
-                        FROM vtigercrm_2022.calendar_2025_materialized
-                        WHERE member_id = '{memberID}'
-                          AND Terminación >= DATE_FORMAT(CURRENT_DATE(), '%Y-%m-%d')
-                          AND Month >= DATE_FORMAT(CURRENT_DATE(), '%Y-%m-01')
-                        LIMIT 1;
-                    """
-                    results = session.execute(text(query)).fetchone()
-                    if results:
-                        problem = results[10]
-                        paidThroughDateCRM = results[12]
-                        salesOrderTermDateCRM = results[13]
-                        salesOrderEffecDateCRM = results[25]
-                        salesorder_no = results[1]
-
-                        if problem == 'Problema Pago':
-                            pass
-                        elif salesOrderTermDateCRM:
-                            if salesOrderTermDateCRM < datetime.date(2025, 1, 1) and salesOrderTermDateCRM != policyTermDate:
-                                self.logger.info(f"La póliza está en crm con una fecha inferior al 2025-01-01 o tiene mal el policy status", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-                            else:
-                                if paidThroughDate and paidThroughDate >= datetime.datetime.strptime(last_day_of_month(datetime.date.today()), '%B %d, %Y').date():
-                                    query_sales = f"SELECT * FROM SalesOrder WHERE salesorder_no = '{salesorder_no}' LIMIT 1;"
-                                    [salesOrderData] = self.vtiger_client.doQuery(query_sales)
-                                    if paidThroughDateCRM and paidThroughDate < paidThroughDateCRM:
-                                        if not (self.company == 'Oscar' and paidThroughDateCRM >= paidThroughDate):                                     
-                                            self.logger.info(f"A la póliza le rebotó la fecha de pago", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-                                    elif not paidThroughDateCRM or paidThroughDate > paidThroughDateCRM:
-                                        response = self.update_sales_order(memberID, paidThroughDate.strftime('%Y-%m-%d'), salesOrderData)
-                                        if response and not response['success']:
-                                            self.logger.info(f"info actualizando la orden de venta: {response['error']}", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-                                else:
-                                    if not salesOrderEffecDateCRM > datetime.date.today():
-                                        self.logger.info(f"Se encontró una orden de venta pero no está paga al {datetime.datetime.strptime(last_day_of_month(datetime.date.today()), '%B %d, %Y').date().strftime('%Y-%m-%d')}", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-                        else:
-                            self.logger.info(f"No se encontró una orden de venta pero si está en el portal", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-
-                    elif (policyTermDate and policyTermDate > datetime.date(2025, 1, 1)) or (paidThroughDate and paidThroughDate > datetime.date(2025, 1, 1)):
-                        self.logger.info(f"La póliza no está en el crm", extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
-            except Exception as e:
-                self.logger.error(f"Error procesando memberID {memberID}: {e}",
-                                  extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
+    @timed()
+    def process_order(self, decision):
+        """
+        Registra el diagnóstico de una fila ya decidida por el DecisionEngine. Retorna
+        (memberID, paidThroughDate, salesorder_no) si la orden de venta debe actualizarse.
+        """
+        memberID = decision.memberID
+        extra = {'memberid': memberID, 'company': self.company, 'broker': self.broker}
+        action = decision.action
+        if action == ACTION_UPDATE:
+            # La orden se recupera por lotes en update_orders
+            return (memberID, decision.paidThroughDate, decision.salesorder_no)
+        message = self.messages.get(action)
+        if message:
+            self.logger.info(message, extra=extra)
+        return None
+
+    def prefetch_crm_rows(self, df):
+        """
+        Carga en memoria, con pocas consultas, las filas del CRM de todos los miembros del CSV.
+        MergeResult.matched no las reemplaza: trae solo la orden de venta del mes en curso
+        de la compañía y el broker, y las reglas de decisión usan la primera fila vigente
+        del calendario del miembro, de cualquier compañía y desde el mes en curso.
+        """
+        member_ids = df['memberID'].astype(str).unique()
+        self.df_crm = self.repo.fetch_calendar_rows(member_ids)
+        return self.df_crm
+
+    def scan(self, chunks):
+        """
+        Primera pasada del CSV por bloques, ya unidos a las órdenes de venta del CRM:
+        elige la fila autoritativa de cada miembro en todo el CSV y, con estado
+        incremental, suma su huella. Así un miembro repartido en varios bloques se decide
+        y se actualiza una sola vez, y su huella no depende de cómo se partió el CSV.
+        """
+        winners, fingerprints = [], []
+        pending = reduced = 0
+        for df in chunks:
+            winners.append(self.engine.member_winners(df))
+            if self.state is not None:
+                fingerprints.append(self.state.fingerprints(df, self.context.month_start))
+            pending += len(winners[-1])
+            # Se reduce cuando lo acumulado alcanza a lo ya reducido: costo lineal en total
+            if pending >= reduced:
+                winners = [self.engine.combine_winners(winners)]
+                if self.state is not None:
+                    fingerprints = [self.state.combine_fingerprints(fingerprints)]
+                pending, reduced = 0, len(winners[0])
+        self.winners = self.engine.combine_winners(winners) if winners else None
+        if self.state is not None and fingerprints:
+            self.fingerprints = self.state.combine_fingerprints(fingerprints)
+        self.decided = set()
+
+    def log_duplicates(self, decisions):
+        """
+        Registra un diagnóstico por cada fila de un memberID repetido que no se usó,
+        indicando la fecha de pago de la fila que sí se usó.
+        """
+        duplicates = decisions[~decisions['authoritative']]
+        if duplicates.empty:
+            return
+        get_metrics().incr('duplicate_rows', len(duplicates))
+        extras = [
+            {'memberid': memberID, 'company': self.company, 'broker': self.broker}
+            for memberID in duplicates['memberID']
+        ]
+        log_many(self.logger, logging.INFO,
+                 "memberID repetido en el CSV; se usó la fila con la fecha de pago más reciente", extras)
+
+    def log_update_result(self, memberID: str, response, error=None):
+        extra = {'memberid': memberID, 'company': self.company, 'broker': self.broker}
+        if error is not None:
+            self.logger.error(f"Error updating memberID {memberID}: {error}")
+        elif response and not response['success']:
+            self.logger.info(f"info actualizando la orden de venta: {response['error']}", extra=extra)
 
     def update_orders(self, df):
-        for _, row in tqdm(df.iterrows(), total=len(df), desc="Actualizando Órdenes de Venta..."):
-            self.process_order(row)
+        metrics = get_metrics()
+        if self.state is not None:
+            # Solo los miembros cuyos datos del carrier cambiaron desde la última ejecución
+            df, fingerprints = self.state.filter_changed(df, self.context.month_start, self.fingerprints)
+            if df.empty:
+                return
+        with metrics.stage('prefetch_crm'):
+            if self.winners is None:
+                df_crm = self.prefetch_crm_rows(df)
+            else:
+                # Solo los miembros cuya fila autoritativa está en este bloque
+                authoritative = self.engine.authoritative_rows(self.engine.parse_dates(df), self.winners, self.decided)
+                df_crm = self.prefetch_crm_rows(df[authoritative])
+        with metrics.stage('decide'):
+            decisions = self.engine.decide(df, df_crm, self.winners, self.decided)
+        if self.winners is not None:
+            self.decided.update(decisions.loc[decisions['authoritative'], 'memberID'])
+        for action, count in decisions.loc[decisions['authoritative'], 'action'].value_counts().items():
+            metrics.incr(f'decisions_{action}', int(count))
+
+        with metrics.stage('diagnostics'):
+            self.log_duplicates(decisions)
+            # Solo la fila autoritativa de cada miembro con diagnóstico o actualización pasa al bucle
+            actionable = decisions[decisions['authoritative'] & (decisions['action'] != ACTION_SKIP)]
+            pending = []
+            plan_entries = []
+            for decision in tqdm(iter_decision_rows(actionable), total=len(actionable), desc="Actualizando Órdenes de Venta..."):
+                update = self.process_order(decision)
+                if update:
+                    pending.append(update)
+                elif self.plan is not None:
+                    plan_entries.append(diagnostic_entry(decision.memberID, decision.action, decision.salesorder_no))
+
+        with metrics.stage('fetch_sales_orders'):
+            sales_orders = self.sales_order_repo.fetch_by_numbers(salesorder_no for _, _, salesorder_no in pending)
+        jobs = []
+        failed = set()
+        for memberID, paidThroughDate, salesorder_no in pending:
+            salesOrderData = sales_orders.get(salesorder_no)
+            if salesOrderData is None:
+                failed.add(memberID)
+                self.logger.error(f"Error procesando memberID {memberID}: no se encontró la orden de venta en VTiger",
+                                  extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
+                if self.plan is not None:
+                    plan_entries.append(diagnostic_entry(memberID, 'missing_in_vtiger', salesorder_no))
+                continue
+            valuemap = self.build_update(paidThroughDate, salesOrderData)
+            if valuemap is not None:
+                jobs.append((memberID, valuemap))
+                if self.plan is not None:
+                    plan_entries.append(update_entry(memberID, salesorder_no, paidThroughDate, valuemap))
+            else:
+                metrics.incr('updates_skipped')
+
+        if self.plan is not None:
+            # En modo plan nada se envía a VTiger ni se guarda en el estado incremental
+            self.plan.write(plan_entries)
+            metrics.incr('updates_planned', len(jobs))
+            return
+
+        if self.journal is not None:
+            self.journal.enqueue(jobs)
+            # Las actualizaciones ya están en el diario, así que el estado puede guardarse
+            # antes de enviarlas: si la ejecución se interrumpe, resume las reenvía
+            if self.state is not None:
+                self.state.save(decisions, fingerprints, failed)
+            self.send_updates(jobs)
+            return
+
+        failed |= self.send_updates(jobs)
+        if self.state is not None:
+            self.state.save(decisions, fingerprints, failed)
+
+    def send_updates(self, jobs) -> set:
+        """
+        Envía los trabajos (memberID, valuemap) al pool y registra sus resultados.
+        Retorna los memberIDs cuya actualización falló; su estado incremental se borra
+        para que la siguiente ejecución los vuelva a procesar.
+        """
+        metrics = get_metrics()
+        failed = set()
+
+        def on_result(memberID, response, error):
+            self.log_update_result(memberID, response, error)
+            if error is not None or not response or not response['success']:
+                failed.add(memberID)
+                if self.journal is not None:
+                    self.journal.mark(memberID, FAILED, error if error is not None else response and response['error'])
+            elif self.journal is not None:
+                self.journal.mark(memberID, SUCCEEDED)
+
+        on_start = (lambda memberID: self.journal.mark(memberID, SENT)) if self.journal is not None else None
+        with metrics.stage('send_updates'):
+            self.executor.run(self.vtiger_client.doUpdate, jobs, on_start=on_start, on_result=on_result)
+        if self.journal is not None:
+            self.journal.flush()
+        if self.state is not None:
+            # Con el diario el estado se guarda antes de enviar; un fallo no debe quedar como al día
+            self.state.forget(failed)
+        metrics.incr('updates_failed', len(failed))
+        metrics.incr('updates_succeeded', len(jobs) - len(failed))
+        return failed
+
+    def apply_plan(self, entries) -> set:
+        """
+        Envía las actualizaciones de un plan escrito en una ejecución anterior, sin
+        volver a leer el CSV ni el CRM.
+        """
+        jobs = planned_updates(entries)
+        if self.journal is not None:
+            self.journal.enqueue(jobs)
+        return self.send_updates(jobs)
+
+    def resume(self) -> set:
+        """
+        Reenvía las actualizaciones del diario que no terminaron con éxito en una
+        ejecución anterior. El valuemap se arma de nuevo sobre la orden de venta vigente
+        en VTiger, recuperada por lotes. Las que vencieron se descartan y sus miembros
+        pierden el estado incremental, para que el CSV los vuelva a decidir.
+        """
+        if self.journal is None:
+            return set()
+        expired = self.journal.expire()
+        if expired:
+            if self.state is not None:
+                self.state.forget(expired)
+            get_metrics().incr('updates_expired', len(expired))
+            self.logger.warning(f"Se descartaron {len(expired)} actualizaciones del diario tras "
+                                f"{self.journal.max_attempts} intentos o {self.journal.max_age_hours:g} horas")
+        pending = self.journal.unfinished()
+        if not pending:
+            return set()
+        get_metrics().incr('updates_resumed', len(pending))
+        self.logger.info(f"Reanudando {len(pending)} actualizaciones pendientes del diario")
+        with get_metrics().stage('fetch_sales_orders'):
+            sales_orders = self.sales_order_repo.fetch_by_numbers(salesorder_no for _, salesorder_no, _ in pending)
+        jobs = []
+        failed = set()
+        for memberID, salesorder_no, paidThroughDate in pending:
+            salesOrderData = sales_orders.get(salesorder_no)
+            if salesOrderData is None:
+                failed.add(memberID)
+                self.journal.mark(memberID, FAILED, 'no se encontró la orden de venta en VTiger')
+                self.logger.error(f"Error procesando memberID {memberID}: no se encontró la orden de venta en VTiger",
+                                  extra={'memberid': memberID, 'company': self.company, 'broker': self.broker})
+                continue
+            valuemap = self.build_update(paidThroughDate, salesOrderData)
+            if valuemap is None:
+                # VTiger ya tiene la fecha: la actualización llegó antes de la interrupción
+                self.journal.mark(memberID, SUCCEEDED)
+            else:
+                jobs.append((memberID, valuemap))
+        self.journal.flush()
+        if self.state is not None:
+            self.state.forget(failed)
+        return failed | self.send_updates(jobs)
@@ -0,0 +1,95 @@
+# File: company_sync/handlers/update_executor.py
+import http.client
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from company_sync.metrics import get_metrics
+
+# Errores de red que justifican reintentar una llamada al CRM
+RETRYABLE_ERRORS = (OSError, http.client.HTTPException)
+
+class TokenBucket:
+    """
+    Limitador de tasa tipo token bucket, seguro entre hilos.
+    """
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class UpdateExecutor:
+    """
+    Ejecuta llamadas al CRM con un pool acotado de hilos, límite de tasa y
+    reintentos con backoff exponencial. Con workers=1 las llamadas se hacen en serie.
+    """
+    def __init__(self, workers: int = 1, max_rps: float = None, retries: int = 3, backoff: float = 0.5):
+        self.workers = max(1, workers)
+        self.limiter = TokenBucket(max_rps) if max_rps else None
+        self.retries = retries
+        self.backoff = backoff
+        # Número de reintentos realizados durante la ejecución
+        self.retry_count = 0
+        self._retry_lock = threading.Lock()
+
+    def call(self, func, *args):
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                return func(*args)
+            except RETRYABLE_ERRORS:
+                if attempt >= self.retries:
+                    raise
+                with self._retry_lock:
+                    self.retry_count += 1
+                get_metrics().incr('vtiger_retries')
+                time.sleep(self.backoff * (2 ** attempt) + random.uniform(0, self.backoff))
+                attempt += 1
+
+    def run(self, func, jobs, desc="Enviando actualizaciones...", on_start=None, on_result=None):
+        """
+        Aplica func a cada job (key, *args). Retorna una lista de (key, resultado, error)
+        en el orden en que terminan las llamadas. on_start(key) se llama desde el hilo
+        que hace la llamada, justo antes; on_result(key, resultado, error) desde el hilo
+        que invoca run, a medida que terminan.
+        """
+        results = []
+        if self.workers == 1:
+            for key, *args in tqdm(jobs, desc=desc):
+                results.append(self._safe_call(func, key, args, on_start))
+                if on_result:
+                    on_result(*results[-1])
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._safe_call, func, key, args, on_start) for key, *args in jobs]
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                results.append(future.result())
+                if on_result:
+                    on_result(*results[-1])
+        return results
+
+    def _safe_call(self, func, key, args, on_start=None):
+        if on_start:
+            on_start(key)
+        try:
+            return (key, self.call(func, *args), None)
+        except Exception as e:
+            return (key, None, e)
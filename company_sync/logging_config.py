@@ -1,13 +1,70 @@
 # File: company_sync/logging_config.py
+import atexit
 import logging
-from handlers.csv_handler import CSVHandler  # Se asume que CSVHandler está implementado
+import logging.handlers
+import os
+import queue
+from handlers.csv_handler import BufferedCSVHandler, CSVHandler  # Se asume que CSVHandler está implementado
+from handlers.log_sinks import JSONLSink, ParquetSink
 
-def setup_logging(log_file='problems.csv'):
+def setup_logging(log_file='problems.csv', buffered=False, sinks=()):
+    """
+    Configura el logger de problemas. Con buffered=True los registros se encolan y un
+    hilo de fondo los escribe por lotes; sinks admite 'jsonl' y 'parquet', escritos
+    junto a log_file con la misma base de nombre.
+    """
     logger = logging.getLogger('company_sync')
     logger.setLevel(logging.INFO)
     fieldnames = ['company', 'broker', 'date', 'time', 'memberid', 'description']
-    csv_handler = CSVHandler(log_file, fieldnames=fieldnames)
     formatter = logging.Formatter("%(message)s")
+    if not buffered:
+        csv_handler = CSVHandler(log_file, fieldnames=fieldnames)
+        csv_handler.setFormatter(formatter)
+        logger.addHandler(csv_handler)
+        return logger
+
+    base = os.path.splitext(log_file)[0]
+    sink_handlers = []
+    if 'jsonl' in sinks:
+        sink_handlers.append(JSONLSink(base + '.jsonl'))
+    if 'parquet' in sinks:
+        sink_handlers.append(ParquetSink(base + '.parquet', fieldnames))
+    csv_handler = BufferedCSVHandler(log_file, fieldnames=fieldnames, sinks=sink_handlers)
     csv_handler.setFormatter(formatter)
-    logger.addHandler(csv_handler)
-    return logger
\ No newline at end of file
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, csv_handler, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    def shutdown():
+        # Vacía la cola y escribe el último lote antes de salir
+        listener.stop()
+        csv_handler.close()
+    atexit.register(shutdown)
+    return logger
+
+def log_many(logger, level, message, extras):
+    """
+    Registra el mismo mensaje una vez por cada dict de extras. Los handlers que
+    implementan emit_many reciben todos los registros en una sola escritura.
+    """
+    if not extras or not logger.isEnabledFor(level):
+        return
+    records = [logger.makeRecord(logger.name, level, __file__, 0, message, None, None, extra=extra) for extra in extras]
+    records = [record for record in records if logger.filter(record)]
+    current = logger
+    while current:
+        for handler in current.handlers:
+            if level < handler.level:
+                continue
+            if hasattr(handler, 'emit_many'):
+                accepted = [record for record in records if handler.filter(record)]
+                with handler.lock:
+                    handler.emit_many(accepted)
+            else:
+                for record in records:
+                    handler.handle(record)
+        if not current.propagate:
+            break
+        current = current.parent
@@ -0,0 +1,191 @@
+# File: company_sync/metrics.py
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Límites (segundos) de los histogramas de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*self.buckets, float('inf')], self.counts):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': buckets}
+
+
+class RunMetrics:
+    """
+    Métricas de una ejecución: tiempo por etapa, contadores e histogramas de latencia.
+    Es seguro actualizarlas desde los hilos del UpdateExecutor.
+    """
+    def __init__(self, **labels):
+        self.labels = labels
+        self.stages = {}
+        self.counters = Counter()
+        # Contadores que avanzaron durante cada etapa (incluye los de sus etapas anidadas)
+        self.stage_counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        with self.lock:
+            before = self.counters.copy()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - started)
+            with self.lock:
+                counters = self.stage_counters.setdefault(name, Counter())
+                for counter, value in self.counters.items():
+                    if value != before[counter]:
+                        counters[counter] += value - before[counter]
+
+    def add_stage_time(self, name: str, seconds: float):
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def timed_iter(self, iterable, name: str):
+        """Acumula en la etapa name el tiempo de producir cada elemento de iterable."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add_stage_time(name, time.perf_counter() - started)
+            yield item
+
+    def incr(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                'labels': dict(self.labels),
+                'started': self.started,
+                'wall_seconds': round(time.time() - self.started, 6),
+                'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+                'counters': dict(self.counters),
+                'stage_counters': {name: dict(counters) for name, counters in self.stage_counters.items()},
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def write_json(self, path: str):
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path: str):
+        """Escribe las métricas en formato textfile de Prometheus (node_exporter)."""
+        data = self.to_dict()
+        base = data['labels']
+        lines = [
+            '# TYPE company_sync_stage_seconds gauge',
+            *(f"company_sync_stage_seconds{_labels(base, stage=name)} {seconds}" for name, seconds in data['stages'].items()),
+        ]
+        for name, value in sorted(data['counters'].items()):
+            lines += [f'# TYPE company_sync_{name}_total counter', f"company_sync_{name}_total{_labels(base)} {value}"]
+        for histogram in data['histograms']:
+            metric = f"company_sync_{histogram['name']}_seconds"
+            labels = {**base, **histogram['labels']}
+            lines.append(f'# TYPE {metric} histogram')
+            lines += [f"{metric}_bucket{_labels(labels, le=bound)} {count}" for bound, count in histogram['buckets'].items()]
+            lines += [f"{metric}_sum{_labels(labels)} {histogram['sum']}", f"{metric}_count{_labels(labels)} {histogram['count']}"]
+        lines.append(f"company_sync_last_run_timestamp_seconds{_labels(base)} {data['started']}")
+        _write_atomic(path, '\n'.join(lines) + '\n')
+
+
+def _labels(base: dict, **extra) -> str:
+    labels = {**base, **extra}
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+def _write_atomic(path: str, content: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+_current = RunMetrics()
+
+def get_metrics() -> RunMetrics:
+    """Retorna las métricas de la ejecución en curso."""
+    return _current
+
+def reset_metrics(**labels) -> RunMetrics:
+    """Inicia métricas nuevas para una ejecución, con las etiquetas dadas."""
+    global _current
+    _current = RunMetrics(**labels)
+    return _current
+
+def record_vtiger_call(operation: str, seconds: float, error=None):
+    """Callback on_request de VTigerWSClient: cuenta y mide cada llamada HTTP."""
+    metrics = get_metrics()
+    metrics.incr(f'vtiger_{operation}_calls')
+    if error is not None:
+        metrics.incr(f'vtiger_{operation}_errors')
+    metrics.observe('vtiger_request', seconds, operation=operation)
+
+# Las funciones decoradas con timed solo se miden con la medición activada (--profile o --metrics-*)
+_timing = False
+
+def enable_timing(enabled: bool = True):
+    """Activa o desactiva la medición de las funciones decoradas con timed."""
+    global _timing
+    _timing = enabled
+
+def timed(name: str = None):
+    """
+    Decorador que, con enable_timing activo, mide cada llamada a la función en el
+    histograma call_seconds de la ejecución en curso, etiquetado con function=name
+    (por defecto el __qualname__). Sin medición solo llama a la función.
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _timing:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                get_metrics().observe('call', time.perf_counter() - started, function=label)
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+# File: company_sync/processors/csv_cache.py
+import hashlib
+import logging
+import os
+import pandas as pd
+import config
+
+class CSVCache:
+    """
+    Caché columnar (Feather/Arrow sin compresión, apta para memory-map) del DataFrame
+    normalizado de cada CSV. La llave combina el hash del contenido del archivo con el
+    nombre, la versión y los campos de la estrategia. Requiere pyarrow (extra 'cache').
+    """
+    SUFFIX = '.feather'
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or config.CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else config.CACHE_MAX_MB * 1024 * 1024
+        self.logger = logging.getLogger(__name__)
+        try:
+            import pyarrow  # noqa: F401
+            self.enabled = True
+        except ImportError:
+            self.enabled = False
+
+    def key(self, csv_path: str, strategy) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        fields = repr(sorted(strategy.get_fields().items()))
+        digest.update(f"{type(strategy).__name__}:{strategy.version}:{fields}:{strategy.cache_token()}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def load(self, key: str):
+        """Retorna el DataFrame cacheado o None si no existe."""
+        if not self.enabled or not os.path.exists(self._path(key)):
+            return None
+        from pyarrow import feather
+        path = self._path(key)
+        os.utime(path)
+        return feather.read_table(path, memory_map=True).to_pandas()
+
+    def iter_batches(self, key: str, chunksize: int):
+        """
+        Entrega el DataFrame cacheado por bloques de chunksize filas, o None si no existe.
+        Los bloques no dependen de cómo se escribió la entrada (completa o por bloques)
+        y, como los que se leen del CSV, no traen columnas category.
+        """
+        if not self.enabled or not os.path.exists(self._path(key)):
+            return None
+        import pyarrow as pa
+        path = self._path(key)
+        os.utime(path)
+
+        def batches():
+            with pa.memory_map(path) as source:
+                # Sobre el memory-map, read_all y slice no copian datos; solo to_pandas materializa cada bloque
+                table = pa.ipc.open_file(source).read_all()
+                for start in range(0, table.num_rows, chunksize):
+                    df = table.slice(start, chunksize).to_pandas()
+                    for column in df.columns:
+                        if isinstance(df[column].dtype, pd.CategoricalDtype):
+                            df[column] = df[column].astype(object)
+                    yield df
+        return batches()
+
+    def store(self, key: str, df: pd.DataFrame):
+        if not self.enabled:
+            return
+        with self.writer(key) as writer:
+            writer.write(df)
+
+    def writer(self, key: str):
+        return CacheWriter(self, key)
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta respetar el tamaño máximo."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.SUFFIX):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+class CacheWriter:
+    """
+    Escribe una entrada del caché bloque a bloque. Si algún bloque no respeta el esquema
+    del primero, la entrada se descarta sin afectar el procesamiento.
+    """
+    def __init__(self, cache: CSVCache, key: str):
+        self.cache = cache
+        self.path = cache._path(key)
+        self.tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self.writer = None
+        self.schema = None
+        self.failed = not cache.enabled
+
+    def __enter__(self):
+        return self
+
+    def write(self, df: pd.DataFrame):
+        if self.failed:
+            return
+        import pyarrow as pa
+        try:
+            if self.writer is None:
+                os.makedirs(self.cache.cache_dir, exist_ok=True)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                options = pa.ipc.IpcWriteOptions(compression=None)
+                self.schema = table.schema
+                self.writer = pa.ipc.new_file(self.tmp_path, self.schema, options=options)
+            else:
+                table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            self.writer.write_table(table)
+        except (pa.ArrowException, OSError) as e:
+            self.cache.logger.debug(f"No se pudo escribir el caché {self.path}: {e}")
+            self._abort()
+
+    def _abort(self):
+        self.failed = True
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None or self.failed or self.writer is None:
+            self._abort()
+            return False
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+        self.cache.evict()
+        return False
@@ -1,25 +1,68 @@
 # File: company_sync/processors/csv_processor.py
 import pandas as pd
 import logging
-from company_sync.utils import conditional_update
+from contextlib import nullcontext
+from company_sync.utils import compact_frame, conditional_update, normalize_dates
 
 class CSVProcessor:
-    def __init__(self, csv_path: str, strategy):
+    def __init__(self, csv_path: str, strategy, chunksize: int = None, cache=None):
         self.csv_path = csv_path
         self.strategy = strategy  # Estrategia que implementa CompanyStrategy
+        # Con chunksize el CSV se lee por bloques en lugar de cargarlo completo
+        self.chunksize = chunksize
+        # CSVCache opcional con el resultado normalizado de ejecuciones anteriores
+        self.cache = cache if cache is not None and cache.enabled else None
         self.logger = logging.getLogger(__name__)
-    
+
+    def _read_options(self) -> dict:
+        # Solo se leen las columnas que usa la estrategia, todas como texto
+        columns = self.strategy.required_columns()
+        return {'usecols': lambda column: column in columns, 'dtype': str}
+
     def read_csv(self) -> pd.DataFrame:
-        df = pd.read_csv(self.csv_path)
+        df = pd.read_csv(self.csv_path, **self._read_options())
         if df.empty:
             self.logger.info("CSV is empty")
         return df
 
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = self.strategy.apply_logic(df)
+        df = normalize_dates(df, self.strategy.get_fields())
+        # Aquí se podría aplicar filtrado adicional usando conditional_update si es necesario
+        # Por bloques no se usan category: cada bloque tendría su propio diccionario y el
+        # archivo Arrow del caché solo admite uno por columna
+        return compact_frame(df, categories=not self.chunksize)
+
     def process(self) -> pd.DataFrame:
+        key = self.cache.key(self.csv_path, self.strategy) if self.cache else None
+        if key:
+            df = self.cache.load(key)
+            if df is not None:
+                return df
         df = self.read_csv()
         if df.empty:
             return df
-        df = self.strategy.apply_logic(df)
-        # Aquí se podría aplicar filtrado adicional usando conditional_update si es necesario
+        df = self.transform(df).reset_index(drop=True)
+        if key:
+            self.cache.store(key, df)
         return df
 
+    def iter_chunks(self):
+        """
+        Lee el CSV por bloques de chunksize filas y entrega cada bloque ya procesado.
+        """
+        key = self.cache.key(self.csv_path, self.strategy) if self.cache else None
+        if key:
+            batches = self.cache.iter_batches(key, self.chunksize)
+            if batches is not None:
+                yield from batches
+                return
+
+        reader = pd.read_csv(self.csv_path, chunksize=self.chunksize, **self._read_options())
+        with reader, (self.cache.writer(key) if key else nullcontext()) as writer:
+            for df in reader:
+                if not df.empty:
+                    df = self.transform(df)
+                    if writer:
+                        writer.write(df)
+                    yield df
@@ -0,0 +1,28 @@
+# File: company_sync/processors/csv_validator.py
+import csv
+
+def validate_csv(csv_path: str, strategy) -> list:
+    """
+    Revisa que el CSV se pueda leer y que, con sus columnas, la estrategia produzca las
+    columnas normalizadas que usa la sincronización. Solo lee el encabezado. Retorna
+    la lista de problemas encontrados (vacía si es válido).
+    """
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), None)
+    except (OSError, UnicodeDecodeError) as e:
+        return [f"No se pudo leer {csv_path}: {e}"]
+    if not header:
+        return [f"{csv_path} está vacío"]
+
+    import pandas as pd
+    # apply_logic sobre un DataFrame sin filas: mismas columnas que en una ejecución real
+    columns = strategy.required_columns()
+    df = pd.DataFrame({column: pd.Series(dtype=str) for column in header if column in columns})
+    normalized = strategy.apply_logic(df).columns
+    problems = []
+    if 'memberID' not in normalized:
+        problems.append("La estrategia no produce la columna memberID con las columnas del CSV")
+    if 'paidThroughDate' not in normalized:
+        problems.append("La estrategia no produce la columna paidThroughDate; no habrá actualizaciones")
+    return problems
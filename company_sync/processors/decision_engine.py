@@ -0,0 +1,161 @@
+# File: company_sync/processors/decision_engine.py
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from company_sync.run_context import RunContext
+from company_sync.utils import normalize_dates
+
+# Acciones posibles para cada fila del CSV
+ACTION_UPDATE = 'update'
+ACTION_BOUNCED = 'bounced'
+ACTION_UNPAID = 'unpaid'
+ACTION_MISSING = 'missing'
+ACTION_NO_SALES_ORDER = 'no_sales_order'
+ACTION_TERM_DATE_PROBLEM = 'term_date_problem'
+ACTION_SKIP = 'skip'
+
+@dataclass(slots=True, frozen=True)
+class DecisionRow:
+    """Datos de una fila decidida que usa SOUpdater.process_order."""
+    memberID: str
+    action: str
+    salesorder_no: object
+    # 'YYYY-MM-DD', o NaN si el CSV no trae la fecha
+    paidThroughDate: object
+
+def iter_decision_rows(decisions: pd.DataFrame):
+    """
+    Recorre las decisiones como DecisionRow, leyendo de los arrays de cada columna
+    sin construir una Series ni una tupla con todas las columnas por fila.
+    """
+    paid = decisions['paidThroughDate'].dt.strftime('%Y-%m-%d')
+    columns = (decisions['memberID'].to_numpy(), decisions['action'].to_numpy(),
+               decisions['salesorder_no'].to_numpy(), paid.to_numpy())
+    for values in zip(*columns):
+        yield DecisionRow(*values)
+
+class DecisionEngine:
+    """
+    Calcula en forma columnar la acción de cada fila del CSV frente a su fila del CRM,
+    aplicando las mismas reglas que antes se evaluaban fila por fila.
+    """
+    def __init__(self, company: str, data_config: dict, context: RunContext = None):
+        self.company = company
+        self.data_config = data_config
+        self.context = context or RunContext.create()
+
+    def parse_dates(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Normalmente CSVProcessor ya entrega las fechas como datetime64
+        df = normalize_dates(df.copy(), self.data_config)
+        paid = self._column(df, 'paidThroughDate')
+        term = self._column(df, 'policyTermDate')
+        if self.company.lower() == 'molina':
+            term = term.where(term.isna(), self.context.molina_term_date)
+        return pd.DataFrame({'memberID': df['memberID'].astype(str), 'paidThroughDate': paid, 'policyTermDate': term})
+
+    def authoritative_rows(self, df: pd.DataFrame, winners: pd.DataFrame = None, decided=()) -> pd.Series:
+        """
+        Marca la fila que representa a cada memberID repetido: la de fecha de pago más
+        reciente, luego la de terminación más reciente y, en empate, la primera del CSV.
+        Con winners (ver member_winners), calculado sobre todo el CSV, se marca la primera
+        fila que coincide con las fechas ganadoras de su miembro, salvo que el miembro
+        esté en decided por haberse decidido ya en un bloque anterior.
+        """
+        if winners is not None:
+            return self._winner_rows(df, winners, decided)
+        ordered = df.sort_values(['paidThroughDate', 'policyTermDate'], ascending=False,
+                                 na_position='last', kind='stable')
+        chosen = ordered.drop_duplicates(subset='memberID', keep='first').index
+        return pd.Series(df.index.isin(chosen), index=df.index)
+
+    def member_winners(self, df_csv: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fechas de la fila autoritativa de cada memberID de df_csv, indexadas por memberID.
+        Con combine_winners se reducen los de varios bloques a los de todo el CSV.
+        """
+        return self.combine_winners([self.parse_dates(df_csv).set_index('memberID')])
+
+    def combine_winners(self, frames) -> pd.DataFrame:
+        """
+        Reduce resultados de member_winners, en el orden del CSV, a la fila autoritativa
+        de cada memberID; en empate gana la del primer frame.
+        """
+        df = pd.concat(frames).reset_index()
+        return df[self.authoritative_rows(df)].set_index('memberID')
+
+    def decide(self, df_csv: pd.DataFrame, df_crm: pd.DataFrame, winners: pd.DataFrame = None, decided=()) -> pd.DataFrame:
+        """
+        Retorna un DataFrame alineado con df_csv con la columna 'action' y los datos
+        del CRM necesarios para registrar diagnósticos o enviar actualizaciones. Los
+        memberIDs repetidos se deciden una sola vez, con su fila autoritativa, y la
+        decisión se replica en todas sus filas; 'authoritative' marca la elegida. Con
+        winners, los miembros cuya fila autoritativa no está en df_csv quedan en 'skip'.
+        """
+        df = self.parse_dates(df_csv)
+        df.index = df_csv.index
+        authoritative = self.authoritative_rows(df, winners, decided)
+        members = self._decide(df[authoritative], df_crm)
+        decisions = members.set_index('memberID').reindex(df['memberID']).reset_index()
+        decisions['action'] = decisions['action'].fillna(ACTION_SKIP)
+        decisions.index = df_csv.index
+        decisions['authoritative'] = authoritative
+        return decisions
+
+    def _winner_rows(self, df: pd.DataFrame, winners: pd.DataFrame, decided) -> pd.Series:
+        best = winners.reindex(df['memberID']).set_axis(df.index)
+        matches = df['memberID'].isin(winners.index) & ~df['memberID'].isin(decided)
+        for column in ('paidThroughDate', 'policyTermDate'):
+            matches &= df[column].eq(best[column]) | (df[column].isna() & best[column].isna())
+        chosen = df[matches].drop_duplicates(subset='memberID', keep='first').index
+        return pd.Series(df.index.isin(chosen), index=df.index)
+
+    def _decide(self, df: pd.DataFrame, df_crm: pd.DataFrame) -> pd.DataFrame:
+        crm = df_crm.assign(found=True)
+        for column in ('paidThroughDateCRM', 'salesOrderTermDateCRM', 'salesOrderEffecDateCRM'):
+            crm[column] = pd.to_datetime(crm[column], errors='coerce')
+        df = df.merge(crm, on='memberID', how='left')
+        df['found'] = df['found'].eq(True)
+
+        today = self.context.today
+        current_month_end = self.context.month_end
+        cutoff_date = self.context.cutoff_date
+        paid = df['paidThroughDate']
+        term = df['policyTermDate']
+        paid_crm = df['paidThroughDateCRM']
+        term_crm = df['salesOrderTermDateCRM']
+
+        eligible = (term > cutoff_date) | (paid > cutoff_date)
+        is_paid = paid.notna() & (paid >= current_month_end)
+        bounced = is_paid & paid_crm.notna() & (paid < paid_crm)
+
+        conditions = [
+            ~eligible,
+            ~df['found'],
+            df['problem'] == 'Problema Pago',
+            term_crm.isna(),
+            (term_crm < cutoff_date) & (term_crm != term),
+            bounced & (self.company == 'Oscar'),
+            bounced,
+            is_paid & (paid_crm.isna() | (paid > paid_crm)),
+            is_paid,
+            ~(df['salesOrderEffecDateCRM'] > today),
+        ]
+        choices = [
+            ACTION_SKIP,
+            ACTION_MISSING,
+            ACTION_SKIP,
+            ACTION_NO_SALES_ORDER,
+            ACTION_TERM_DATE_PROBLEM,
+            ACTION_SKIP,
+            ACTION_BOUNCED,
+            ACTION_UPDATE,
+            ACTION_SKIP,
+            ACTION_UNPAID,
+        ]
+        df['action'] = np.select(conditions, choices, default=ACTION_SKIP)
+        return df
+
+    def _column(self, df: pd.DataFrame, column: str) -> pd.Series:
+        if column not in df.columns:
+            return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        return df[column]
@@ -0,0 +1,42 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from company_sync.metrics import get_metrics
+
+@contextmanager
+def profile_run(path: str, **meta):
+    """
+    Perfila con cProfile el bloque y escribe en path un archivo pstats (abrible con
+    snakeviz o `python -m pstats`), junto a path + '.json' con los metadatos de la
+    ejecución, las filas procesadas y las funciones más costosas.
+    """
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:25]
+        report = {
+            **meta,
+            'rows': get_metrics().counters.get('csv_rows', 0),
+            'seconds': round(elapsed, 3),
+            'top_cumulative': [
+                {
+                    'function': f"{os.path.basename(filename)}:{line}({function})",
+                    'calls': calls,
+                    'total_seconds': round(total, 6),
+                    'cumulative_seconds': round(cumulative, 6),
+                }
+                for (filename, line, function), (_, calls, total, cumulative, _) in top
+            ],
+        }
+        with open(f"{path}.json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,103 @@
+# File: company_sync/repositories/crm_queries.py
+import threading
+from sqlalchemy import bindparam, text
+import config
+
+CALENDAR_VIEW = 'vtigercrm_2022.calendar_2025_materialized'
+
+# Posición de cada columna en la vista, tal como la leía el código con results[n]
+CALENDAR_POSITIONS = {
+    'salesorder_no': 1,
+    'problem': 10,
+    'paidThroughDateCRM': 12,
+    'salesOrderTermDateCRM': 13,
+    'salesOrderEffecDateCRM': 25,
+}
+
+# Nombre del broker en el CRM según su código
+BROKER_NAMES = {'BS': 'BEATRIZ SIERRA'}
+DEFAULT_BROKER_NAME = 'ANA DANIELLA CORRALES'
+
+def broker_name(broker: str) -> str:
+    return BROKER_NAMES.get(broker, DEFAULT_BROKER_NAME)
+
+def _configured_columns() -> dict:
+    """Lee CRM_CALENDAR_COLUMNS ("problem=Problema,paidThroughDateCRM=...") de config."""
+    columns = {}
+    for pair in filter(None, (item.strip() for item in config.CRM_CALENDAR_COLUMNS.split(','))):
+        key, _, name = pair.partition('=')
+        if key.strip() not in CALENDAR_POSITIONS or not name.strip():
+            raise ValueError(f"CRM_CALENDAR_COLUMNS inválido: {pair!r}")
+        columns[key.strip()] = name.strip()
+    return columns
+
+
+class CalendarQueries:
+    """
+    Consultas a la vista del calendario con parámetros enlazados y lista explícita de
+    columnas. Los nombres de las columnas se resuelven una sola vez por proceso: de
+    CRM_CALENDAR_COLUMNS o, en su defecto, de las posiciones históricas en la vista.
+    """
+    _lock = threading.Lock()
+    _resolved = None
+
+    def __init__(self, session):
+        self.columns = self.resolve_columns(session)
+        quote = session.get_bind().dialect.identifier_preparer.quote
+        selected = ", ".join(f"{quote(name)} AS {quote(key)}" for key, name in self.columns.items())
+
+        self.sales_orders = text(f"""
+            SELECT member_id, so_no
+            FROM {CALENDAR_VIEW}
+            WHERE Compañía = :company
+              AND Broker = :broker
+              AND Terminación >= :today
+              AND Month = :month_start
+              AND rn = OV_Count
+        """)
+        self.calendar_rows = text(f"""
+            SELECT member_id, {selected}
+            FROM {CALENDAR_VIEW}
+            WHERE member_id IN :member_ids
+              AND Terminación >= :today
+              AND Month >= :month_start
+        """).bindparams(bindparam('member_ids', expanding=True))
+
+        # Copia local (CRMSnapshot): todas las compañías y brokers, del mes en curso en adelante
+        snapshot = f"""
+            SELECT member_id, Compañía AS {quote('company')}, Broker AS {quote('broker')}, Month AS {quote('month')},
+                   rn AS {quote('rn')}, OV_Count AS {quote('ov_count')}, Terminación AS {quote('term_date')}, {selected}
+            FROM {CALENDAR_VIEW}
+        """
+        self.snapshot_rows = text(snapshot + " WHERE Month >= :month_start")
+        self.snapshot_month_rows = text(snapshot + " WHERE Month = :month_start")
+
+    @classmethod
+    def resolve_columns(cls, session) -> dict:
+        """
+        Retorna {clave: nombre de columna} y verifica que todas existan en la vista.
+        """
+        with cls._lock:
+            if cls._resolved is None:
+                view_columns = list(session.execute(text(f"SELECT * FROM {CALENDAR_VIEW} LIMIT 0")).keys())
+                session.commit()
+                configured = _configured_columns()
+                columns = {}
+                for key, position in CALENDAR_POSITIONS.items():
+                    if key in configured:
+                        columns[key] = configured[key]
+                    elif position < len(view_columns):
+                        columns[key] = view_columns[position]
+                    else:
+                        raise ValueError(f"La vista {CALENDAR_VIEW} no tiene la columna {position} ({key})")
+                missing = [name for name in ('member_id', *columns.values()) if name not in view_columns]
+                if missing:
+                    raise ValueError(f"La vista {CALENDAR_VIEW} no tiene las columnas: {', '.join(missing)}")
+                cls._resolved = columns
+            return cls._resolved
+
+    @classmethod
+    def reset(cls):
+        """Olvida las columnas resueltas, para volver a leerlas de la vista."""
+        with cls._lock:
+            cls._resolved = None
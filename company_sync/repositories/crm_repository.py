@@ -1,23 +1,93 @@
 # File: company_sync/repositories/crm_repository.py
 import pandas as pd
-from sqlalchemy import text
+import config
 from company_sync.database import get_session
+from company_sync.metrics import get_metrics
+from company_sync.run_context import RunContext
+from company_sync.repositories.crm_queries import CALENDAR_POSITIONS, CalendarQueries, broker_name
 
 class CRMRepository:
-    def __init__(self, company: str, broker: str):
+    # Cantidad máxima de memberIDs por cada consulta IN (...)
+    CHUNK_SIZE = 1000
+
+    def __init__(self, company: str, broker: str, yield_per: int = None, snapshot=None, context=None):
         self.company = company
         self.broker = broker
+        # Filas por lote del cursor de servidor en fetch_sales_orders (0 lee todo de una vez)
+        self.yield_per = config.DB_YIELD_PER if yield_per is None else yield_per
+        # Número de consultas SQL emitidas durante la ejecución
+        self.query_count = 0
+        self._queries = None
+        # CRMSnapshot opcional: si está al día, las lecturas no llegan a MySQL
+        self.snapshot = snapshot
+        self._use_snapshot = None
+        # Fechas de la ejecución; todas las consultas usan el mismo 'hoy'
+        self.context = context or RunContext.create()
+
+    def use_snapshot(self) -> bool:
+        """Decide una vez por ejecución si se lee de la copia local o de la vista en vivo."""
+        if self._use_snapshot is None:
+            self._use_snapshot = self.snapshot is not None and self.snapshot.is_fresh(self.context.date_params()['month_start'])
+        return self._use_snapshot
+
+    @property
+    def queries(self) -> CalendarQueries:
+        if self._queries is None:
+            self._queries = CalendarQueries(get_session())
+        return self._queries
+
+    def check_columns(self) -> dict:
+        """
+        Resuelve y valida las columnas de la vista del calendario. Se llama al inicio de
+        la ejecución para fallar antes de procesar el CSV si la vista cambió. Con la
+        copia local al día no se consulta la vista.
+        """
+        if self.use_snapshot():
+            return self.snapshot.columns()
+        return self.queries.columns
 
     def fetch_sales_orders(self) -> pd.DataFrame:
-        with get_session() as session:
-            query = f"""
-                SELECT member_id, so_no
-                FROM vtigercrm_2022.calendar_2025_materialized
-                WHERE Compañía = '{self.company}'
-                  AND Broker = '{'BEATRIZ SIERRA' if self.broker == 'BS' else 'ANA DANIELLA CORRALES'}'
-                  AND Terminación >= DATE_FORMAT(CURRENT_DATE(), '%Y-%m-%d')
-                  AND Month = DATE_FORMAT(CURRENT_DATE(), '%Y-%m-01')
-                  AND rn = OV_Count;
-            """
-            result = session.execute(text(query)).fetchall()
-            return pd.DataFrame(result, columns=["memberID", "salesOrder_no"])
\ No newline at end of file
+        if self.use_snapshot():
+            return self.snapshot.sales_orders(self.company, self.broker, **self.context.date_params())
+        session = get_session()
+        params = {'company': self.company, 'broker': broker_name(self.broker), **self.context.date_params()}
+        if self.yield_per:
+            # Cursor del lado del servidor: el resultado se lee por lotes sin cargarlo entero
+            result = session.execute(self.queries.sales_orders, params, execution_options={'yield_per': self.yield_per})
+            frames = [pd.DataFrame(partition, columns=["memberID", "salesOrder_no"]) for partition in result.partitions()]
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["memberID", "salesOrder_no"])
+        else:
+            df = pd.DataFrame(session.execute(self.queries.sales_orders, params).fetchall(), columns=["memberID", "salesOrder_no"])
+        session.commit()
+        self.query_count += 1
+        get_metrics().incr('sql_queries')
+        get_metrics().incr('sql_rows', len(df))
+        return df
+
+    def fetch_calendar_rows(self, member_ids) -> pd.DataFrame:
+        """
+        Carga en bloque las filas vigentes del calendario para los memberIDs dados,
+        usando consultas IN (...) por lotes. Retorna una fila por memberID.
+        """
+        member_ids = list(dict.fromkeys(str(member_id) for member_id in member_ids))
+        if self.use_snapshot():
+            rows = self.snapshot.calendar_rows(member_ids, self.CHUNK_SIZE, **self.context.date_params())
+        else:
+            query = self.queries.calendar_rows
+            params = self.context.date_params()
+            rows = []
+            session = get_session()
+            for start in range(0, len(member_ids), self.CHUNK_SIZE):
+                chunk = member_ids[start:start + self.CHUNK_SIZE]
+                result = session.execute(query, {'member_ids': chunk, **params}).fetchall()
+                rows.extend(result)
+                self.query_count += 1
+                get_metrics().incr('sql_queries')
+                get_metrics().incr('sql_rows', len(result))
+            # Termina la transacción de lectura sin soltar la sesión del hilo
+            session.commit()
+
+        df = pd.DataFrame(rows, columns=["memberID", *CALENDAR_POSITIONS])
+        df["memberID"] = df["memberID"].astype(str)
+        # Se conserva la primera fila por miembro, igual que el antiguo LIMIT 1
+        return df.drop_duplicates(subset="memberID", keep="first")
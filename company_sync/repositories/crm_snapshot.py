@@ -0,0 +1,134 @@
+# File: company_sync/repositories/crm_snapshot.py
+import datetime
+import json
+import os
+import sqlite3
+import pandas as pd
+import config
+from company_sync.database import get_session
+from company_sync.metrics import get_metrics
+from company_sync.repositories.crm_queries import CALENDAR_POSITIONS, CalendarQueries, broker_name
+
+# Columnas de la copia local, en el orden de CalendarQueries.snapshot_rows
+SNAPSHOT_COLUMNS = ['member_id', 'company', 'broker', 'month', 'rn', 'ov_count', 'term_date', *CALENDAR_POSITIONS]
+
+def _to_sqlite(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class CRMSnapshot:
+    """
+    Copia local (SQLite) de las columnas que usa la sincronización de la vista
+    calendar_2025_materialized, para todas las compañías y brokers. La primera carga
+    (y la de cada mes nuevo) copia la vista del mes en curso en adelante; las
+    siguientes solo recargan la partición del mes en curso, que es la que cambia
+    con los pagos. Las lecturas usan la copia mientras tenga menos de max_age_hours.
+    """
+    BATCH_SIZE = 5000
+
+    def __init__(self, path: str = None, max_age_hours: float = None):
+        self.path = path or config.CRM_SNAPSHOT_PATH
+        self.max_age_hours = config.CRM_SNAPSHOT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        column_sql = ", ".join(SNAPSHOT_COLUMNS)
+        self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS calendar ({column_sql});
+            CREATE INDEX IF NOT EXISTS idx_calendar_member ON calendar (member_id);
+            CREATE INDEX IF NOT EXISTS idx_calendar_company ON calendar (company, broker, month);
+            CREATE TABLE IF NOT EXISTS snapshot_meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def _meta(self) -> dict:
+        return dict(self.connection.execute("SELECT key, value FROM snapshot_meta").fetchall())
+
+    def age_hours(self, month_start: str):
+        """
+        Horas desde la última carga, o None si la copia está vacía o no es del mes que
+        empieza en month_start ('YYYY-MM-DD', el de RunContext.date_params).
+        """
+        meta = self._meta()
+        if 'refreshed_at' not in meta or meta.get('month_start') != month_start:
+            return None
+        refreshed_at = datetime.datetime.fromisoformat(meta['refreshed_at'])
+        return (datetime.datetime.now() - refreshed_at).total_seconds() / 3600
+
+    def columns(self) -> dict:
+        """Columnas de la vista con las que se hizo la copia."""
+        return json.loads(self._meta().get('columns', '{}'))
+
+    def is_fresh(self, month_start: str) -> bool:
+        age = self.age_hours(month_start)
+        return age is not None and age <= self.max_age_hours
+
+    def refresh(self, month_start: str, full: bool = False) -> int:
+        """
+        Actualiza la copia desde la vista en vivo, desde el mes que empieza en month_start.
+        Hace una carga completa si se pide, si la copia está vacía, es de otro mes o las
+        columnas de la vista cambiaron; si no, solo recarga ese mes. Retorna la cantidad
+        de filas copiadas.
+        """
+        session = get_session()
+        queries = CalendarQueries(session)
+        meta = self._meta()
+        full = (full or meta.get('month_start') != month_start
+                or meta.get('columns') != json.dumps(queries.columns, sort_keys=True))
+        statement = queries.snapshot_rows if full else queries.snapshot_month_rows
+        result = session.execute(statement, {'month_start': month_start}, execution_options={'yield_per': self.BATCH_SIZE})
+
+        placeholders = ", ".join("?" for _ in SNAPSHOT_COLUMNS)
+        copied = 0
+        # Una sola transacción: los lectores ven la copia anterior hasta el commit
+        with self.connection:
+            if full:
+                self.connection.execute("DELETE FROM calendar")
+            else:
+                self.connection.execute("DELETE FROM calendar WHERE month LIKE ?", (month_start + '%',))
+            for partition in result.partitions():
+                self.connection.executemany(f"INSERT INTO calendar VALUES ({placeholders})",
+                                            ([_to_sqlite(value) for value in row] for row in partition))
+                copied += len(partition)
+            now = datetime.datetime.now().isoformat(timespec='seconds')
+            updates = {'refreshed_at': now, 'month_start': month_start,
+                       'columns': json.dumps(queries.columns, sort_keys=True)}
+            if full:
+                updates['pulled_at'] = now
+            self.connection.executemany("INSERT OR REPLACE INTO snapshot_meta (key, value) VALUES (?, ?)", updates.items())
+        session.commit()
+        get_metrics().incr('sql_queries')
+        get_metrics().incr('snapshot_rows_copied', copied)
+        return copied
+
+    def sales_orders(self, company: str, broker: str, today: str, month_start: str) -> pd.DataFrame:
+        """Equivalente local de CRMRepository.fetch_sales_orders."""
+        rows = self.connection.execute("""
+            SELECT member_id, salesorder_no FROM calendar
+            WHERE company = ? COLLATE NOCASE AND broker = ? COLLATE NOCASE AND term_date >= ? AND month LIKE ? AND rn = ov_count
+            ORDER BY rowid
+        """, (company, broker_name(broker), today, month_start + '%')).fetchall()
+        get_metrics().incr('snapshot_reads')
+        return pd.DataFrame(rows, columns=["memberID", "salesOrder_no"])
+
+    def calendar_rows(self, member_ids, chunk_size: int, today: str, month_start: str) -> list:
+        """Equivalente local de las consultas de CRMRepository.fetch_calendar_rows."""
+        params = (today, month_start)
+        columns = ", ".join(CALENDAR_POSITIONS)
+        rows = []
+        for start in range(0, len(member_ids), chunk_size):
+            chunk = member_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows.extend(self.connection.execute(f"""
+                SELECT member_id, {columns} FROM calendar
+                WHERE member_id IN ({placeholders}) AND term_date >= ? AND month >= ?
+                ORDER BY rowid
+            """, (*chunk, *params)).fetchall())
+            get_metrics().incr('snapshot_reads')
+        return rows
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,135 @@
+# File: company_sync/repositories/state_repository.py
+import datetime
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import config
+from company_sync.processors.decision_engine import ACTION_SKIP, ACTION_UPDATE
+
+# Columnas del CSV unido al CRM que determinan la decisión de cada miembro
+FINGERPRINT_COLUMNS = ['memberID', 'salesOrder_no', 'paidThroughDate', 'policyTermDate']
+
+# Acciones que dejan al miembro al día con el CRM; los diagnósticos (no está en el CRM,
+# sin orden de venta, sin pagar, ...) se vuelven a evaluar en cada ejecución
+SETTLED_ACTIONS = (ACTION_UPDATE, ACTION_SKIP)
+
+class StateRepository:
+    """
+    Estado local (SQLite) de la última ejecución: huella de los datos del carrier por
+    miembro y los valores del CRM vistos entonces. Permite enviar al CRM solo los
+    miembros cuyos datos cambiaron desde la ejecución anterior.
+    """
+    def __init__(self, company: str, broker: str, path: str = None, full: bool = False):
+        self.company = company
+        self.broker = broker
+        # Con full=True se procesan todos los miembros, pero el estado se sigue guardando
+        self.full = full
+        self.path = path or os.path.join(config.STATE_DIR, 'state.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS member_state (
+                company TEXT NOT NULL,
+                broker TEXT NOT NULL,
+                member_id TEXT NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                action TEXT,
+                salesorder_no TEXT,
+                paid_through_crm TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (company, broker, member_id)
+            )
+        """)
+        self.skipped_count = 0
+
+    def fingerprints(self, df: pd.DataFrame, month_start: pd.Timestamp) -> pd.Series:
+        """
+        Huella por memberID de sus filas normalizadas y de su orden de venta en el CRM,
+        de modo que un miembro que gana o cambia de orden de venta se vuelve a procesar.
+        Incluye el mes de la ejecución (RunContext.month_start) porque las reglas de
+        decisión dependen del fin de mes.
+        """
+        columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+        frame = df[columns].assign(memberID=df['memberID'].astype(str),
+                                   period=month_start.strftime('%Y-%m'))
+        if 'salesOrder_no' in frame.columns:
+            frame['salesOrder_no'] = frame['salesOrder_no'].fillna('').astype(str)
+        # Las fechas se hashean en ns para que la huella no dependa de la resolución del frame
+        frame = frame.astype({column: 'datetime64[ns]' for column in columns
+                              if pd.api.types.is_datetime64_any_dtype(frame[column])})
+        hashes = pd.util.hash_pandas_object(frame, index=False)
+        # La suma (módulo 2^64) no depende del orden de las filas de un mismo miembro
+        return hashes.groupby(frame['memberID'].values).sum().astype('int64')
+
+    @staticmethod
+    def combine_fingerprints(parts) -> pd.Series:
+        """
+        Suma por memberID las huellas de varios bloques del CSV; el resultado es el mismo
+        que el de fingerprints sobre el CSV entero.
+        """
+        parts = list(parts)
+        index = pd.Index([]).append([part.index for part in parts])
+        values = np.concatenate([part.to_numpy(dtype='int64') for part in parts]).view('uint64')
+        return pd.Series(values, index=index).groupby(level=0).sum().astype('int64')
+
+    def filter_changed(self, df: pd.DataFrame, month_start: pd.Timestamp, fingerprints: pd.Series = None):
+        """
+        Retorna (filas de los miembros nuevos o modificados, huellas de sus miembros).
+        fingerprints, si se indica, trae las huellas calculadas sobre todo el CSV.
+        """
+        if fingerprints is None:
+            fingerprints = self.fingerprints(df, month_start)
+        else:
+            fingerprints = fingerprints.reindex(df['memberID'].astype(str).unique())
+        if self.full:
+            return df, fingerprints
+        stored = pd.Series(dict(self.connection.execute(
+            "SELECT member_id, fingerprint FROM member_state WHERE company = ? AND broker = ?",
+            (self.company, self.broker),
+        ).fetchall()), dtype='int64')
+        unchanged = fingerprints[fingerprints.eq(stored.reindex(fingerprints.index))].index
+        mask = df['memberID'].astype(str).isin(unchanged)
+        self.skipped_count += int(mask.sum())
+        return df[~mask], fingerprints
+
+    def save(self, decisions: pd.DataFrame, fingerprints: pd.Series, failed=()):
+        """
+        Guarda la huella y los valores del CRM de cada miembro que quedó al día: los
+        actualizados y los que no necesitaban cambios. Los miembros en failed, con un
+        diagnóstico pendiente o con 'Problema Pago' no se guardan, para que se vuelvan a
+        procesar en la siguiente ejecución.
+        """
+        decisions = decisions[decisions['authoritative']]
+        settled = decisions['action'].isin(SETTLED_ACTIONS) & decisions['problem'].ne('Problema Pago')
+        decisions = decisions[settled & ~decisions['memberID'].isin(set(failed))]
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        rows = [
+            (self.company, self.broker, memberID, int(fingerprints[memberID]), action,
+             None if pd.isna(salesorder_no) else str(salesorder_no),
+             None if pd.isna(paid_crm) else paid_crm.strftime('%Y-%m-%d'), now)
+            for memberID, action, salesorder_no, paid_crm in zip(
+                decisions['memberID'], decisions['action'], decisions['salesorder_no'], decisions['paidThroughDateCRM'])
+            if memberID in fingerprints.index
+        ]
+        with self.connection:
+            self.connection.executemany("""
+                INSERT OR REPLACE INTO member_state
+                    (company, broker, member_id, fingerprint, action, salesorder_no, paid_through_crm, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def forget(self, member_ids):
+        """
+        Borra el estado guardado de los miembros, para que la siguiente ejecución los
+        vuelva a procesar aunque sus datos no cambien (p. ej. si su actualización falló).
+        """
+        rows = [(self.company, self.broker, str(memberID)) for memberID in member_ids]
+        if not rows:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM member_state WHERE company = ? AND broker = ? AND member_id = ?", rows)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,141 @@
+# File: company_sync/repositories/update_journal.py
+import datetime
+import os
+import sqlite3
+import threading
+import time
+import config
+
+# Estados de una actualización en el diario
+PENDING = 'pending'
+SENT = 'sent'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+# Superó el límite de intentos o de antigüedad y ya no se reenvía
+EXPIRED = 'expired'
+
+class UpdateJournal:
+    """
+    Diario local (SQLite) de las actualizaciones a VTiger. Cada actualización se
+    registra como pendiente antes de enviarse, con solo la orden de venta y la fecha
+    de pago a escribir, y su estado (enviada, exitosa, fallida) se escribe por lotes.
+    Si la ejecución se interrumpe, las que no terminaron con éxito se reenvían con
+    resume a partir de la orden de venta vigente en VTiger; doUpdate es idempotente,
+    así que reenviar una que ya había llegado a VTiger no cambia el resultado.
+    """
+    def __init__(self, company: str, broker: str, path: str = None, batch_size: int = 200, flush_interval: float = 5.0,
+                 max_attempts: int = None, max_age_hours: float = None):
+        self.company = company
+        self.broker = broker
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts or config.JOURNAL_MAX_ATTEMPTS
+        self.max_age_hours = max_age_hours or config.JOURNAL_MAX_AGE_HOURS
+        self.path = path or os.path.join(config.STATE_DIR, 'journal.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Los estados llegan desde los hilos del UpdateExecutor
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS update_journal (
+                company TEXT NOT NULL,
+                broker TEXT NOT NULL,
+                member_id TEXT NOT NULL,
+                salesorder_no TEXT NOT NULL,
+                paid_through TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (company, broker, member_id)
+            )
+        """)
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def enqueue(self, jobs):
+        """
+        Registra como pendientes los trabajos (memberID, valuemap), en una sola
+        transacción, y descarta las actualizaciones exitosas o vencidas de ejecuciones
+        anteriores. Del valuemap solo se guardan salesorder_no y cf_2261.
+        """
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        rows = [(self.company, self.broker, memberID, valuemap['salesorder_no'], valuemap['cf_2261'], PENDING, now, now)
+                for memberID, valuemap in jobs]
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM update_journal WHERE company = ? AND broker = ? AND state IN (?, ?)",
+                (self.company, self.broker, SUCCEEDED, EXPIRED),
+            )
+            self.connection.executemany("""
+                INSERT OR REPLACE INTO update_journal
+                    (company, broker, member_id, salesorder_no, paid_through, state, attempts, error, enqueued_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, 0, NULL, ?, ?)
+            """, rows)
+
+    def mark(self, memberID: str, state: str, error=None):
+        """
+        Anota el nuevo estado de un miembro; se escribe al completar un lote. Cada
+        FAILED cuenta como un intento.
+        """
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            self.buffer.append((state, int(state == FAILED), None if error is None else str(error), now,
+                                self.company, self.broker, memberID))
+            due = len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer:
+                return
+            entries, self.buffer = self.buffer, []
+            with self.connection:
+                self.connection.executemany("""
+                    UPDATE update_journal SET state = ?, attempts = attempts + ?, error = ?, updated_at = ?
+                    WHERE company = ? AND broker = ? AND member_id = ?
+                """, entries)
+            self.last_flush = time.monotonic()
+
+    def expire(self) -> list:
+        """
+        Marca como vencidas las actualizaciones sin éxito que ya fallaron max_attempts
+        veces o que se registraron hace más de max_age_hours. Retorna los memberIDs vencidos.
+        """
+        self.flush()
+        oldest = (datetime.datetime.now() - datetime.timedelta(hours=self.max_age_hours)).isoformat(timespec='seconds')
+        params = (self.company, self.broker, SUCCEEDED, EXPIRED, self.max_attempts, oldest)
+        where = """
+            WHERE company = ? AND broker = ? AND state NOT IN (?, ?)
+              AND (attempts >= ? OR enqueued_at < ?)
+        """
+        with self.lock, self.connection:
+            member_ids = [row[0] for row in self.connection.execute(f"SELECT member_id FROM update_journal {where}", params)]
+            self.connection.execute(f"UPDATE update_journal SET state = ? {where}", (EXPIRED, *params))
+        return member_ids
+
+    def unfinished(self) -> list:
+        """
+        Retorna (memberID, salesorder_no, paidThroughDate) de las actualizaciones que no
+        terminaron con éxito ni vencieron.
+        """
+        self.flush()
+        return self.connection.execute("""
+            SELECT member_id, salesorder_no, paid_through FROM update_journal
+            WHERE company = ? AND broker = ? AND state NOT IN (?, ?)
+        """, (self.company, self.broker, SUCCEEDED, EXPIRED)).fetchall()
+
+    def counts(self) -> dict:
+        """Cantidad de actualizaciones por estado."""
+        self.flush()
+        return dict(self.connection.execute(
+            "SELECT state, COUNT(*) FROM update_journal WHERE company = ? AND broker = ? GROUP BY state",
+            (self.company, self.broker),
+        ).fetchall())
+
+    def close(self):
+        self.flush()
+        self.connection.close()
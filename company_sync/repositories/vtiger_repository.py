@@ -0,0 +1,48 @@
+# File: company_sync/repositories/vtiger_repository.py
+import logging
+import re
+
+class SalesOrderRepository:
+    # VTiger devuelve como máximo 100 registros por página de consulta
+    PAGE_SIZE = 100
+    # Los números de orden de venta van entre comillas en la consulta: solo se aceptan
+    # letras, dígitos, guiones y guiones bajos
+    SALESORDER_NO_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+    def __init__(self, vtiger_client):
+        self.vtiger_client = vtiger_client
+        self.logger = logging.getLogger(__name__)
+        # Número de llamadas HTTP doQuery emitidas durante la ejecución
+        self.query_count = 0
+
+    def fetch_by_numbers(self, salesorder_nos) -> dict:
+        """
+        Recupera por lotes las órdenes de venta indicadas usando consultas IN (...)
+        paginadas con LIMIT offset,100; un lote solo se vuelve a paginar mientras
+        queden números sin encontrar. Los números que no cumplen SALESORDER_NO_PATTERN
+        se descartan. Retorna un índice salesorder_no -> registro.
+        """
+        salesorder_nos = list(dict.fromkeys(str(so_no) for so_no in salesorder_nos))
+        invalid = [so_no for so_no in salesorder_nos if not self.SALESORDER_NO_PATTERN.fullmatch(so_no)]
+        if invalid:
+            self.logger.error(f"Números de orden de venta inválidos, no se consultan: {', '.join(map(repr, invalid))}")
+            salesorder_nos = [so_no for so_no in salesorder_nos if self.SALESORDER_NO_PATTERN.fullmatch(so_no)]
+        index = {}
+        for start in range(0, len(salesorder_nos), self.PAGE_SIZE):
+            chunk = salesorder_nos[start:start + self.PAGE_SIZE]
+            in_list = ", ".join(f"'{so_no}'" for so_no in chunk)
+            offset = 0
+            while True:
+                query = f"SELECT * FROM SalesOrder WHERE salesorder_no IN ({in_list}) LIMIT {offset},{self.PAGE_SIZE};"
+                records = self.vtiger_client.doQuery(query)
+                self.query_count += 1
+                if records is False:
+                    self.logger.error(f"Error consultando órdenes de venta: {self.vtiger_client.lastError()}")
+                    break
+                for record in records:
+                    index.setdefault(record['salesorder_no'], record)
+                # Solo se pide otra página si la actual vino llena y aún faltan números del lote
+                if len(records) < self.PAGE_SIZE or all(so_no in index for so_no in chunk):
+                    break
+                offset += self.PAGE_SIZE
+        return index
@@ -0,0 +1,49 @@
+# File: company_sync/run_context.py
+import datetime
+from dataclasses import dataclass, field
+import pandas as pd
+import config
+
+# Meses que se restan al fin del mes en curso según el 'Policy status' de Oscar
+OSCAR_STATUS_MONTHS = {
+    'Active': 0,
+    'Grace period': 1,
+    'Delinquent': 2,
+}
+
+@dataclass(frozen=True)
+class RunContext:
+    """
+    Fechas y tablas que dependen del día de la ejecución. Se calculan una sola vez en
+    SOService y las leen las estrategias, el DecisionEngine, el repositorio del CRM y
+    el actualizador, de modo que toda la ejecución usa el mismo 'hoy'.
+    """
+    today: pd.Timestamp
+    month_start: pd.Timestamp
+    month_end: pd.Timestamp
+    # Pólizas que terminan o están pagas hasta esta fecha o antes no se procesan
+    cutoff_date: pd.Timestamp
+    # Fecha de terminación que se asigna a todas las pólizas de Molina
+    molina_term_date: pd.Timestamp
+    # 'Policy status' de Oscar -> paid through date
+    oscar_paid_through: dict = field(default_factory=dict)
+
+    @classmethod
+    def create(cls, today=None, cutoff_date: str = None, molina_term_date: str = None) -> 'RunContext':
+        today = pd.Timestamp(today or datetime.date.today()).normalize()
+        month_end = today + pd.offsets.MonthEnd(0)
+        return cls(
+            today=today,
+            month_start=today.replace(day=1),
+            month_end=month_end,
+            cutoff_date=pd.Timestamp(cutoff_date or config.CUTOFF_DATE),
+            molina_term_date=pd.Timestamp(molina_term_date or config.MOLINA_TERM_DATE),
+            oscar_paid_through={
+                status: month_end - pd.offsets.MonthEnd(months) if months else month_end
+                for status, months in OSCAR_STATUS_MONTHS.items()
+            },
+        )
+
+    def date_params(self) -> dict:
+        """Parámetros de fecha de las consultas al calendario del CRM."""
+        return {'today': self.today.strftime('%Y-%m-%d'), 'month_start': self.month_start.strftime('%Y-%m-%d')}
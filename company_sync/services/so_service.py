@@ -1,21 +1,135 @@
 # File: company_sync/services/sales_order_service.py
+import pandas as pd
+from tqdm import tqdm
 from company_sync.processors.csv_processor import CSVProcessor
 from company_sync.handlers.crm_handler import CRMHandler
+from company_sync.handlers.plan import open_plan, read_plan
 from company_sync.handlers.so_updater import SOUpdater
+from company_sync.database import remove_session
+from company_sync.handlers.update_executor import UpdateExecutor
+from company_sync.metrics import get_metrics
+from company_sync.run_context import RunContext
 from company_sync.utils import get_fields
 
 class SOService:
-    def __init__(self, csv_path: str, company: str, broker: str, strategy, vtiger_client, logger):
-        self.csv_processor = CSVProcessor(csv_path, strategy)
-        self.crm_handler = CRMHandler(company, broker)
+    def __init__(self, csv_path: str, company: str, broker: str, strategy, vtiger_client, logger,
+                 workers: int = 1, max_rps: float = None, retries: int = 3, chunksize: int = None,
+                 cache=None, state=None, plan: str = None, journal=None, snapshot=None, context=None):
+        # Fechas de la ejecución, calculadas una sola vez
+        self.context = context or RunContext.create()
+        if strategy is not None:
+            strategy.use_context(self.context)
+        self.csv_processor = CSVProcessor(csv_path, strategy, chunksize=chunksize, cache=cache)
+        self.crm_handler = CRMHandler(company, broker, snapshot=snapshot, context=self.context)
         data_config = get_fields(company)
-        self.so_updater = SOUpdater(vtiger_client, company, data_config, broker, logger=logger)
+        self.executor = UpdateExecutor(workers=workers, max_rps=max_rps, retries=retries)
+        # Con plan, el pipeline completo se ejecuta pero las actualizaciones se escriben en ese archivo
+        self.plan_path = plan
+        self.so_updater = SOUpdater(vtiger_client, company, data_config, broker, logger=logger,
+                                    repo=self.crm_handler.repo, executor=self.executor, state=state,
+                                    journal=journal, context=self.context)
         self.logger = logger
 
     def process(self):
-        df_csv = self.csv_processor.process()
-        if df_csv.empty:
+        if self.plan_path:
+            self.so_updater.plan = open_plan(self.plan_path)
+        try:
+            self.crm_handler.repo.check_columns()
+            if not self.plan_path:
+                # Primero se terminan las actualizaciones que quedaron de una ejecución interrumpida
+                with get_metrics().stage('update'):
+                    self.so_updater.resume()
+            return self.process_rows()
+        finally:
+            if self.so_updater.plan is not None:
+                self.so_updater.plan.close()
+                self.so_updater.plan = None
+            # La sesión del CRM se mantiene abierta durante toda la ejecución
+            remove_session()
+
+    def apply(self, plan_path: str) -> dict:
+        """
+        Envía a VTiger las actualizaciones de un plan escrito con plan=..., sin leer
+        el CSV ni el CRM.
+        """
+        entries = read_plan(plan_path)
+        with get_metrics().stage('update'):
+            self.so_updater.apply_plan(entries)
+        return self.report()
+
+    def process_rows(self):
+        metrics = get_metrics()
+        if self.csv_processor.chunksize:
+            self.process_streaming()
+        else:
+            with metrics.stage('read_csv'):
+                df_csv = self.csv_processor.process()
+            metrics.incr('csv_rows', len(df_csv))
+            if df_csv.empty:
+                return self.stats()
+            with metrics.stage('fetch_crm'):
+                df_crm = self.crm_handler.fetch_data()
+            with metrics.stage('merge'):
+                merge = self.crm_handler.merge_data(df_crm, df_csv)
+            # Las filas del CSV ya unidas al CRM siguen al actualizador
+            with metrics.stage('update'):
+                self.so_updater.update_orders(merge.csv_rows)
+        return self.report()
+
+    def resume(self) -> dict:
+        """
+        Solo reenvía las actualizaciones pendientes del diario, sin leer el CSV ni el CRM.
+        """
+        with get_metrics().stage('update'):
+            self.so_updater.resume()
+        return self.report()
+
+    def process_streaming(self):
+        """
+        Procesa el CSV bloque a bloque. Solo se conservan en memoria las órdenes de venta
+        del CRM, que se unen a cada bloque, los memberIDs vistos, necesarios para
+        detectar las órdenes de venta que no están en el portal, y la fila autoritativa
+        de cada miembro, elegida en una primera pasada para que un memberID repetido en
+        varios bloques se actualice una sola vez.
+        """
+        metrics = get_metrics()
+        with metrics.stage('fetch_crm'):
+            df_crm = self.crm_handler.fetch_data()
+        with metrics.stage('scan'):
+            self.so_updater.scan(self.joined_chunks(df_crm))
+        member_ids = set()
+        for df_chunk in tqdm(self.joined_chunks(df_crm, count=True), desc="Procesando bloques del CSV..."):
+            member_ids.update(df_chunk['memberID'].astype(str))
+            with metrics.stage('update'):
+                self.so_updater.update_orders(df_chunk)
+        if not member_ids:
+            self.logger.info("CSV is empty")
             return
-        df_crm = self.crm_handler.fetch_data()
-        self.crm_handler.merge_data(df_crm, df_csv)
-        self.so_updater.update_orders(df_csv)
+        with metrics.stage('merge'):
+            self.crm_handler.merge_data(df_crm, pd.DataFrame({'memberID': sorted(member_ids)}))
+
+    def joined_chunks(self, df_crm, count: bool = False):
+        """Bloques del CSV unidos a las órdenes de venta del CRM."""
+        metrics = get_metrics()
+        for df_chunk in metrics.timed_iter(self.csv_processor.iter_chunks(), 'read_csv'):
+            if count:
+                metrics.incr('csv_rows', len(df_chunk))
+            with metrics.stage('merge'):
+                df_chunk = self.crm_handler.join_sales_orders(df_crm, df_chunk)
+            yield df_chunk
+
+    def stats(self) -> dict:
+        return {
+            'sql_queries': self.crm_handler.repo.query_count,
+            'vtiger_queries': self.so_updater.sales_order_repo.query_count,
+            'retries': self.executor.retry_count,
+            'unchanged_rows': self.so_updater.state.skipped_count if self.so_updater.state else 0,
+        }
+
+    def report(self) -> dict:
+        stats = self.stats()
+        tqdm.write(f"Consultas SQL emitidas: {stats['sql_queries']}")
+        tqdm.write(f"Consultas VTiger emitidas: {stats['vtiger_queries']}")
+        tqdm.write(f"Reintentos de actualización: {stats['retries']}")
+        tqdm.write(f"Filas sin cambios omitidas: {stats['unchanged_rows']}")
+        return stats
@@ -0,0 +1,25 @@
+# File: company_sync/snapshot.py
+import argparse
+from company_sync.database import remove_session
+from company_sync.repositories.crm_snapshot import CRMSnapshot
+from company_sync.run_context import RunContext
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the local snapshot of the CRM calendar view')
+    parser.add_argument('--full', action='store_true', help='Copy the whole view instead of only the current month')
+    parser.add_argument('--if-stale', action='store_true', help='Only refresh when the snapshot is older than CRM_SNAPSHOT_MAX_AGE_HOURS')
+    args = parser.parse_args()
+
+    month_start = RunContext.create().date_params()['month_start']
+    snapshot = CRMSnapshot()
+    try:
+        if args.if_stale and snapshot.is_fresh(month_start):
+            print(f"La copia local tiene {snapshot.age_hours(month_start):.1f} horas; no se actualiza")
+            return
+        print(f"Filas copiadas: {snapshot.refresh(month_start, full=args.full)}")
+    finally:
+        snapshot.close()
+        remove_session()
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,16 @@
 # File: company_sync/strategies/aetna_strategy.py
 from company_sync.strategies.base_strategy import BaseStrategy
-from company_sync.utils import calculate_term_date, get_fields
+from company_sync.utils import calculate_term_dates, get_fields
 
 class AetnaStrategy(BaseStrategy):
+    source_columns = ('Member ID', 'Effective Date')
+
     def __init__(self):
         self.fields = get_fields("aetna")
     
     def apply_logic(self, df):
         if 'Effective Date' in df.columns:
-            df['Policy Term Date'] = df['Effective Date'].apply(lambda d: calculate_term_date(d, self.fields['format']))
+            df['Policy Term Date'] = calculate_term_dates(df['Effective Date'], self.fields['format'])
 
         # Renombrar la columna "Member ID" a "memberID"
         if 'Member ID' in df.columns:
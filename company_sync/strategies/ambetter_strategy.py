@@ -0,0 +1,19 @@
+from company_sync.strategies.base_strategy import BaseStrategy
+from company_sync.utils import get_fields
+
+class AmbetterStrategy(BaseStrategy):
+    """Ambetter: renombra las columnas de get_fields."""
+    version = 3
+
+    def __init__(self):
+        self.fields = get_fields("ambetter")
+
+    def apply_logic(self, df):
+        mapping = {
+            self.fields['memberID']: "memberID",
+            self.fields['paidThroughDate']: "paidThroughDate",
+        }
+        return df.rename(columns=mapping)
+
+    def get_fields(self) -> dict:
+        return self.fields
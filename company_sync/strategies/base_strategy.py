@@ -1,7 +1,24 @@
 # File: company_sync/strategies/company_strategy.py
 from abc import ABC, abstractmethod
 
+# Columnas normalizadas que se conservan si el CSV ya las trae con ese nombre
+CANONICAL_COLUMNS = ('memberID', 'paidThroughDate', 'policyTermDate', 'policyEffecDate')
+
 class BaseStrategy(ABC):
+    # Incrementar cuando cambie apply_logic para invalidar el caché de CSVs
+    version = 2
+    # Columnas del CSV que usa apply_logic además de las de get_fields
+    source_columns = ()
+    # RunContext de la ejecución, asignado por SOService
+    context = None
+
+    def use_context(self, context):
+        self.context = context
+
+    def cache_token(self) -> str:
+        """Parte de la clave del caché de CSVs que depende del RunContext."""
+        return ''
+
     @abstractmethod
     def apply_logic(self, df):
         """Aplica la lógica específica de la compañía al DataFrame."""
@@ -11,3 +28,8 @@ class BaseStrategy(ABC):
     def get_fields(self) -> dict:
         """Retorna el mapeo de campos para la compañía."""
         pass
+
+    def required_columns(self) -> set:
+        """Retorna las columnas del CSV que la estrategia necesita leer."""
+        fields = {value for key, value in self.get_fields().items() if key != 'format'}
+        return fields | set(self.source_columns) | set(CANONICAL_COLUMNS)
@@ -0,0 +1,14 @@
+# File: company_sync/strategies/default_strategy.py
+from company_sync.strategies.base_strategy import BaseStrategy
+from company_sync.utils import get_fields
+
+class DefaultStrategy(BaseStrategy):
+    """Estrategia por defecto (sin lógica especial)."""
+    def __init__(self, company: str):
+        self.fields = get_fields(company)
+
+    def apply_logic(self, df):
+        return df
+
+    def get_fields(self) -> dict:
+        return self.fields
@@ -0,0 +1,22 @@
+from company_sync.strategies.base_strategy import BaseStrategy
+from company_sync.utils import get_fields
+
+class MolinaStrategy(BaseStrategy):
+    """
+    Molina: renombra las columnas de get_fields. La fecha de terminación la fija el
+    DecisionEngine con RunContext.molina_term_date.
+    """
+    version = 3
+
+    def __init__(self):
+        self.fields = get_fields("molina")
+
+    def apply_logic(self, df):
+        mapping = {
+            self.fields['memberID']: "memberID",
+            self.fields['paidThroughDate']: "paidThroughDate",
+        }
+        return df.rename(columns=mapping)
+
+    def get_fields(self) -> dict:
+        return self.fields
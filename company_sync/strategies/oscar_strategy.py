@@ -1,16 +1,18 @@
 # File: company_sync/strategies/oscar_strategy.py
+from company_sync.run_context import RunContext
 from company_sync.strategies.base_strategy import BaseStrategy
-from company_sync.utils import calculate_paid_through_date, get_fields
+from company_sync.utils import calculate_paid_through_dates, get_fields
 
 class OscarStrategy(BaseStrategy):
+    source_columns = ('Member ID', 'Policy status', 'Coverage start date', 'Coverage end date')
+
     def __init__(self):
         self.fields = get_fields("oscar")
     
     def apply_logic(self, df):
         if 'Policy status' in df.columns:
-            df['Paid Through Date'] = df['Policy status'].apply(
-                lambda s: calculate_paid_through_date(s, self.fields['format'])
-            )
+            context = self.context or RunContext.create()
+            df['Paid Through Date'] = calculate_paid_through_dates(df['Policy status'], context.oscar_paid_through)
         # Renombrar la columna "Member ID" a "memberID"
         if 'Member ID' in df.columns:
             df.rename(columns={"Member ID": "memberID"}, inplace=True)
@@ -28,5 +30,9 @@ class OscarStrategy(BaseStrategy):
         }
         return df.rename(columns=mapping)
 
+    def cache_token(self) -> str:
+        # El paid through date depende del mes de la ejecución
+        return (self.context or RunContext.create()).month_end.strftime('%Y-%m')
+
     def get_fields(self) -> dict:
         return self.fields
\ No newline at end of file
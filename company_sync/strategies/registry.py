@@ -0,0 +1,39 @@
+# File: company_sync/strategies/registry.py
+import importlib
+from importlib.metadata import entry_points
+
+# Grupo de entry points con el que otros paquetes registran estrategias de carriers
+ENTRY_POINT_GROUP = 'company_sync.strategies'
+
+# Estrategias incluidas, como 'módulo:Clase' para importarlas solo al usarlas. Son la
+# única lista de las estrategias propias; el grupo de entry points es para otros paquetes
+BUILTIN_STRATEGIES = {
+    'aetna': 'company_sync.strategies.aetna_strategy:AetnaStrategy',
+    'ambetter': 'company_sync.strategies.ambetter_strategy:AmbetterStrategy',
+    'molina': 'company_sync.strategies.molina_strategy:MolinaStrategy',
+    'oscar': 'company_sync.strategies.oscar_strategy:OscarStrategy',
+}
+DEFAULT_STRATEGY = 'company_sync.strategies.default_strategy:DefaultStrategy'
+
+def _load(target: str):
+    module, _, name = target.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+def registered_strategies() -> dict:
+    """
+    Retorna {compañía: loader} con las estrategias incluidas y las registradas por
+    entry points. Ninguna se importa hasta llamar a su loader.
+    """
+    strategies = {company: (lambda target=target: _load(target)) for company, target in BUILTIN_STRATEGIES.items()}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        strategies[entry_point.name.lower()] = entry_point.load
+    return strategies
+
+def build_strategy(company: str):
+    """
+    Instancia la estrategia de la compañía, o DefaultStrategy si no hay una registrada.
+    """
+    loader = registered_strategies().get(company.lower())
+    if loader is None:
+        return _load(DEFAULT_STRATEGY)(company)
+    return loader()()
@@ -1,5 +1,16 @@
 # File: company_sync/utils.py
-import datetime
+import importlib.util
+import pandas as pd
+
+# Con pyarrow los memberIDs se guardan como un solo buffer de texto en vez de objetos str
+MEMBER_ID_DTYPE = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else object
+
+# Columnas de fecha normalizadas y su formato en el CSV (None = formato de get_fields)
+DATE_COLUMNS = {
+    'paidThroughDate': None,
+    'policyTermDate': '%m/%d/%Y',
+    'policyEffecDate': '%m/%d/%Y',
+}
 
 def get_fields(company: str) -> dict:
     company = company.lower()
@@ -36,26 +47,42 @@ def conditional_update(company: str) -> dict:
         return {'cond': '!=', 'Policy status': 'Inactive'}
     return {}
 
-def calculate_paid_through_date(status: str, date_format: str = '%B %d, %Y') -> str:
-    today = datetime.date.today()
-    if status == 'Active':
-        return last_day_of_month(today, date_format)
-    elif status == 'Delinquent':
-        two_months_ago = (today.replace(day=1) - datetime.timedelta(days=1))
-        two_months_ago = (two_months_ago.replace(day=1) - datetime.timedelta(days=1))
-        return last_day_of_month(two_months_ago, date_format)
-    elif status == 'Grace period':
-        last_month = today.replace(day=1) - datetime.timedelta(days=1)
-        return last_day_of_month(last_month, date_format)
-    else:
-        return ''
-
-def calculate_term_date(effective_date: str, input_format: str = '%B %d, %Y') -> str:
-    effective_dt = datetime.datetime.strptime(effective_date, input_format)
-    term_date = effective_dt.replace(year=effective_dt.year + 1, month=12)
-    return last_day_of_month(term_date, input_format)
-
-def last_day_of_month(any_day: datetime.date, date_format: str = '%B %d, %Y') -> str:
-    next_month = any_day.replace(day=28) + datetime.timedelta(days=4)
-    last_day = next_month - datetime.timedelta(days=next_month.day)
-    return last_day.strftime(date_format)
+def calculate_paid_through_dates(statuses: pd.Series, paid_through: dict) -> pd.Series:
+    """
+    Calcula el paid through date de cada 'Policy status' de Oscar con la tabla
+    RunContext.oscar_paid_through. Los estados desconocidos quedan como NaT.
+    """
+    return pd.to_datetime(statuses.map(paid_through))
+
+def calculate_term_dates(effective_dates: pd.Series, input_format: str = '%B %d, %Y') -> pd.Series:
+    """
+    Calcula el fin de cobertura (31 de diciembre del año siguiente) de cada fecha efectiva.
+    """
+    effective = pd.to_datetime(effective_dates, format=input_format, errors='coerce')
+    return effective + pd.offsets.YearEnd(0) + pd.offsets.YearEnd(1)
+
+def normalize_dates(df: pd.DataFrame, data_config: dict) -> pd.DataFrame:
+    """
+    Convierte una sola vez las columnas de fecha normalizadas a datetime64.
+    Los valores vacíos o con formato inválido quedan como NaT.
+    """
+    for column, date_format in DATE_COLUMNS.items():
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], format=date_format or data_config['format'], errors='coerce')
+    return df
+
+def compact_frame(df: pd.DataFrame, categories: bool = True) -> pd.DataFrame:
+    """
+    Reduce la memoria del CSV normalizado: memberID como texto de pyarrow, fechas en
+    segundos y, con categories, columnas de texto con pocos valores distintos (estados)
+    como category.
+    """
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            df[column] = series.astype('datetime64[s]')
+        elif column == 'memberID':
+            df[column] = series.astype(MEMBER_ID_DTYPE)
+        elif categories and series.dtype == object and series.nunique() <= len(series) // 2:
+            df[column] = series.astype('category')
+    return df
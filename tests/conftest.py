@@ -0,0 +1,66 @@
+# File: tests/conftest.py
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Mismo layout de imports que usa el paquete instalado (config, WSClient y handlers como módulos de primer nivel)
+for path in (ROOT, os.path.join(ROOT, 'company_sync')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import re
+
+import pandas as pd
+import pytest
+
+class StubVTiger:
+    """
+    Cliente VTiger en memoria con las operaciones que usa SOUpdater. Con fail=True
+    doUpdate responde con error; updates registra los valuemaps recibidos.
+    """
+    def __init__(self, salesorder_nos):
+        self.records = {so_no: {'id': f'6x{i}', 'salesorder_no': so_no, 'cf_2261': ''}
+                        for i, so_no in enumerate(salesorder_nos, start=1)}
+        self.queries = []
+        self.updates = []
+        self.fail = False
+
+    def doQuery(self, query):
+        self.queries.append(query)
+        if re.search(r'LIMIT\s+[1-9]\d*\s*,', query):
+            return []
+        return [dict(self.records[so_no]) for so_no in re.findall(r"'([^']*)'", query) if so_no in self.records]
+
+    def doUpdate(self, valuemap):
+        self.updates.append(dict(valuemap))
+        if self.fail:
+            return {'success': False, 'error': {'code': 'UNAVAILABLE', 'message': 'VTiger caído'}}
+        self.records[valuemap['salesorder_no']]['cf_2261'] = valuemap['cf_2261']
+        return {'success': True, 'result': valuemap}
+
+    def lastError(self):
+        return None
+
+@pytest.fixture
+def fake_crm(tmp_path, monkeypatch):
+    """
+    Apunta company_sync.database a un CRM SQLite de prueba (benchmarks.fake_crm).
+    Retorna una función que crea la vista con filas de generate_crm_rows.
+    """
+    import config
+    from benchmarks.fake_crm import create_crm, install
+    from company_sync import database
+    from company_sync.repositories.crm_queries import CalendarQueries
+
+    def reset():
+        database.remove_session()
+        database.dispose()
+        database._engines.clear()
+        CalendarQueries.reset()
+
+    monkeypatch.setattr(config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'main.sqlite'}")
+    reset()
+    path = str(tmp_path / 'crm.sqlite')
+    install(database.get_reporting_engine(), path)
+    yield lambda rows: create_crm(path, pd.DataFrame(rows))
+    reset()
@@ -0,0 +1,24 @@
+# File: tests/test_crm_snapshot.py
+from company_sync.repositories.crm_snapshot import CRMSnapshot
+from company_sync.run_context import RunContext
+
+def crm_row(member_id: str, month: str) -> dict:
+    return {
+        'member_id': member_id, 'so_no': f'SO{member_id}', 'company': 'Acme', 'broker': 'BEATRIZ SIERRA',
+        'month': month, 'problem': '', 'paid_through': '2025-02-28', 'term': '2025-12-31', 'effective': '2025-01-01',
+    }
+
+def test_snapshot_freshness_follows_the_month_of_the_run_context(tmp_path, fake_crm):
+    fake_crm([crm_row('M1', '2025-03-01'), crm_row('M2', '2025-04-01')])
+    march = RunContext.create(today='2025-03-15').date_params()['month_start']
+    april = RunContext.create(today='2025-04-02').date_params()['month_start']
+    snapshot = CRMSnapshot(str(tmp_path / 'snapshot.sqlite'), max_age_hours=1)
+
+    assert snapshot.refresh(march) == 2
+    assert snapshot.is_fresh(march)
+    # Una ejecución de otro mes no usa la copia aunque sea reciente
+    assert snapshot.age_hours(april) is None
+    assert not snapshot.is_fresh(april)
+    assert snapshot.refresh(april) == 1
+    assert snapshot.is_fresh(april)
+    snapshot.close()
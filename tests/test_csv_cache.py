@@ -0,0 +1,29 @@
+# File: tests/test_csv_cache.py
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from benchmarks.generate_data import generate_carrier_csv
+from company_sync.processors.csv_cache import CSVCache
+from company_sync.processors.csv_processor import CSVProcessor
+from company_sync.run_context import RunContext
+from company_sync.strategies.registry import build_strategy
+
+def oscar_strategy():
+    strategy = build_strategy('oscar')
+    strategy.use_context(RunContext.create(today='2025-03-15'))
+    return strategy
+
+def test_cached_full_read_is_streamed_in_chunksize_blocks(tmp_path):
+    csv_path = str(tmp_path / 'oscar.csv')
+    generate_carrier_csv('oscar', 2500, csv_path, seed=1)
+    cache = CSVCache(cache_dir=str(tmp_path / 'cache'))
+    full = CSVProcessor(csv_path, oscar_strategy(), cache=cache).process()
+
+    chunks = list(CSVProcessor(csv_path, oscar_strategy(), chunksize=1000, cache=cache).iter_chunks())
+
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert not any(isinstance(dtype, pd.CategoricalDtype) for chunk in chunks for dtype in chunk.dtypes)
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert streamed['memberID'].astype(str).tolist() == full['memberID'].astype(str).tolist()
@@ -0,0 +1,78 @@
+# File: tests/test_so_updater.py
+"""
+SOService de punta a punta contra el CRM SQLite de benchmarks y un VTiger en memoria.
+"""
+import logging
+
+import pandas as pd
+import pytest
+
+from company_sync.repositories.state_repository import StateRepository
+from company_sync.repositories.update_journal import UpdateJournal
+from company_sync.services.so_service import SOService
+from company_sync.strategies.registry import build_strategy
+from conftest import StubVTiger
+
+COMPANY = 'Acme'
+BROKER = 'BS'
+
+def month_end(months: int = 0) -> pd.Timestamp:
+    return pd.Timestamp.today().normalize() + pd.offsets.MonthEnd(0) + pd.offsets.MonthEnd(months)
+
+def crm_row(member_id: str, paid_through: pd.Timestamp) -> dict:
+    today = pd.Timestamp.today().normalize()
+    return {
+        'member_id': member_id, 'so_no': f'SO{member_id}', 'company': COMPANY, 'broker': 'BEATRIZ SIERRA',
+        'month': today.replace(day=1).strftime('%Y-%m-%d'), 'problem': '',
+        'paid_through': paid_through.strftime('%Y-%m-%d'),
+        'term': (today + pd.DateOffset(years=1)).strftime('%Y-%m-%d'),
+        'effective': (today - pd.DateOffset(years=1)).strftime('%Y-%m-%d'),
+    }
+
+def write_csv(path, rows) -> str:
+    pd.DataFrame([
+        {'memberID': member_id, 'paidThroughDate': paid.strftime('%m/%d/%Y'),
+         'policyTermDate': month_end(12).strftime('%m/%d/%Y')}
+        for member_id, paid in rows
+    ]).to_csv(path, index=False)
+    return str(path)
+
+def run(csv_path, client, tmp_path, chunksize=None, max_attempts=None):
+    service = SOService(csv_path, COMPANY, BROKER, build_strategy(COMPANY), client, logging.getLogger(__name__),
+                        chunksize=chunksize,
+                        state=StateRepository(COMPANY, BROKER, path=str(tmp_path / 'state.sqlite')),
+                        journal=UpdateJournal(COMPANY, BROKER, path=str(tmp_path / 'journal.sqlite'),
+                                              max_attempts=max_attempts))
+    service.process()
+    return service
+
+def test_failed_updates_are_retried_after_their_journal_entry_expires(tmp_path, fake_crm):
+    fake_crm([crm_row('M1', month_end(-1))])
+    csv_path = write_csv(tmp_path / 'acme.csv', [('M1', month_end(1))])
+    client = StubVTiger(['SOM1'])
+
+    client.fail = True
+    run(csv_path, client, tmp_path, max_attempts=2)
+    run(csv_path, client, tmp_path, max_attempts=2)
+    client.fail = False
+    client.updates.clear()
+    run(csv_path, client, tmp_path, max_attempts=2)
+
+    assert len(client.updates) == 1
+    assert client.records['SOM1']['cf_2261'] == month_end(1).strftime('%Y-%m-%d')
+
+@pytest.mark.parametrize('paid_dates', [(2, 1), (1, 2)])
+def test_member_repeated_across_chunks_is_updated_once_with_its_latest_row(tmp_path, fake_crm, paid_dates):
+    fake_crm([crm_row('M1', month_end(-1)), crm_row('M2', month_end(-1))])
+    rows = [('M1', month_end(paid_dates[0])), ('M2', month_end(1)), ('M1', month_end(paid_dates[1]))]
+    csv_path = write_csv(tmp_path / 'acme.csv', rows)
+    client = StubVTiger(['SOM1', 'SOM2'])
+
+    run(csv_path, client, tmp_path, chunksize=1)
+
+    assert sorted(update['salesorder_no'] for update in client.updates) == ['SOM1', 'SOM2']
+    assert client.records['SOM1']['cf_2261'] == month_end(2).strftime('%Y-%m-%d')
+    # La huella sumada por bloques queda guardada: la siguiente ejecución no consulta VTiger
+    client.queries.clear()
+    run(csv_path, client, tmp_path, chunksize=1)
+    assert client.queries == []
@@ -0,0 +1,29 @@
+# File: tests/test_vtiger_repository.py
+from company_sync.repositories.vtiger_repository import SalesOrderRepository
+
+class RecordingClient:
+    """Cliente VTiger mínimo: registra las consultas y responde con las órdenes pedidas."""
+    def __init__(self, salesorder_nos):
+        self.records = [{'salesorder_no': so_no} for so_no in salesorder_nos]
+        self.queries = []
+
+    def doQuery(self, query):
+        self.queries.append(query)
+        return [record for record in self.records if f"'{record['salesorder_no']}'" in query]
+
+    def lastError(self):
+        return None
+
+def test_fetch_by_numbers_skips_numbers_that_would_break_the_query():
+    client = RecordingClient(['SO1', 'SO2'])
+    index = SalesOrderRepository(client).fetch_by_numbers(['SO1', "SO'2", 'SO2'])
+    assert set(index) == {'SO1', 'SO2'}
+    assert len(client.queries) == 1
+    assert "SO'2" not in client.queries[0]
+
+def test_fetch_by_numbers_stops_paging_once_every_number_is_found():
+    numbers = [f'SO{i}' for i in range(SalesOrderRepository.PAGE_SIZE)]
+    client = RecordingClient(numbers)
+    index = SalesOrderRepository(client).fetch_by_numbers(numbers)
+    assert len(index) == len(numbers)
+    assert len(client.queries) == 1